@@ -0,0 +1,36 @@
+"""
+AVD Web版本 - Gunicorn生产环境配置
+
+使用方式: gunicorn main:app -c gunicorn.conf.py
+开发环境仍使用 python main.py（单进程 + 自动重载）
+
+注意：WebSocket连接、字幕任务管理器、处理队列、SSE进度和 /status 数据
+都只保存在各worker进程内存中。多worker时，查询进度或状态的请求可能落到
+未执行该任务的worker上，得到404或过期数据。在这些状态迁移到共享存储
+（如Redis）之前默认只启动1个worker；确认部署不依赖上述状态时，
+再通过 WEB_CONCURRENCY 显式设置worker数量
+"""
+
+import os
+
+from src.core.config import settings
+
+# 监听地址
+bind = f"{settings.HOST}:{settings.PORT}"
+
+# worker配置 - 任务状态保存在进程内存中，默认单worker，需要多worker时显式设置 WEB_CONCURRENCY
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+worker_class = "src.core.workers.AvdUvicornWorker"  # uvloop + httptools
+
+# 超时配置（与 main.py 中的 uvicorn 配置保持一致）
+timeout = 300
+graceful_timeout = 60
+keepalive = 300
+
+# 在fork前加载应用，导入只执行一次
+preload_app = True
+
+# 日志
+loglevel = settings.LOG_LEVEL.lower()
+accesslog = "-"
+errorlog = "-"
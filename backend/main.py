@@ -6,26 +6,34 @@ AVD Web版本 - 后端主入口文件
 """
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, WebSocket, BackgroundTasks
+import anyio
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import os
 import logging
 from pathlib import Path
+import sys
 import asyncio
 import tracemalloc
 import warnings
-import json
+import orjson
+from urllib.parse import quote
 
 from src.api.routers import downloads, subtitles, auth, system
 from src.core.config import settings
 from src.core.database import init_db
+from src.core.cache import response_cache
+from src.core.middleware import RequestSizeLimitMiddleware
+from src.core.subtitle_processor import get_subtitle_processor_instance
 from src.core.websocket_manager import websocket_manager
 from src.utils.logger import setup_logger
 
-# 启用内存追踪以减少警告
-tracemalloc.start()
+# 内存追踪会拖慢每次内存分配，仅在调试时通过 AVD_TRACEMALLOC 显式开启
+if settings.DEBUG and os.environ.get("AVD_TRACEMALLOC"):
+    tracemalloc.start(25)
 
 # 过滤一些无害的警告
 warnings.filterwarnings("ignore", message=".*Enable tracemalloc.*")
@@ -41,15 +49,22 @@ async def lifespan(app: FastAPI):
     # 启动时初始化
     logger.info("正在启动AVD Web服务...")
     
+    # 同步数据库接口在线程池中运行，扩大默认线程池（默认40）
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    
     # 初始化数据库
     await init_db()
     
-    # 创建必要的目录
-    os.makedirs(settings.FILES_PATH, exist_ok=True)  # 统一的文件目录
-    os.makedirs(settings.DOWNLOAD_PATH, exist_ok=True)  # 向后兼容
-    os.makedirs(settings.UPLOAD_PATH, exist_ok=True)    # 向后兼容
-    os.makedirs(settings.TEMP_PATH, exist_ok=True)
-    os.makedirs(settings.MODELS_PATH, exist_ok=True)
+    # 初始化响应缓存
+    await response_cache.init()
+    
+    # 启动时创建字幕处理器单例，首个字幕请求不再承担初始化开销
+    app.state.subtitle_processor = get_subtitle_processor_instance()
+    
+    # 创建必要的目录（FILES_PATH/DOWNLOAD_PATH/UPLOAD_PATH 默认指向同一目录，去重后创建）
+    for path in {settings.FILES_PATH, settings.DOWNLOAD_PATH, settings.UPLOAD_PATH,
+                 settings.TEMP_PATH, settings.MODELS_PATH}:
+        Path(path).mkdir(parents=True, exist_ok=True)
     
     logger.info("AVD Web服务启动完成")
     
@@ -57,12 +72,20 @@ async def lifespan(app: FastAPI):
     
     # 关闭时清理
     logger.info("正在关闭AVD Web服务...")
+    await response_cache.close()
 
 app = FastAPI(
     title="AVD - 全能视频下载器 Web版",
     description="功能强大的Web端视频下载工具，支持多平台下载、AI字幕生成和翻译",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+# 限制请求体大小（在CORS之内，413响应同样带有CORS头）
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_body_size=settings.MAX_FILE_SIZE_MB * 1024 * 1024,
 )
 
 # 配置CORS
@@ -83,24 +106,40 @@ app.include_router(system.router, prefix="/api/v1/system", tags=["系统"])
 # 新的统一字幕处理系统已整合持久化功能
 
 # 静态文件服务 - 统一文件访问路径
-app.mount("/uploads", StaticFiles(directory=settings.FILES_PATH), name="uploads")
-app.mount("/downloads", StaticFiles(directory=settings.FILES_PATH), name="downloads")
-app.mount("/files", StaticFiles(directory=settings.FILES_PATH), name="files")  # 新的统一访问路径
+app.mount("/files", StaticFiles(directory=settings.FILES_PATH), name="files")
+
+# 向后兼容的访问路径，重定向到统一路径
+# 同时注册HEAD，与之前的静态文件挂载一致（客户端用HEAD探测文件是否存在）
+@app.api_route("/uploads/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+@app.api_route("/downloads/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def legacy_file_redirect(file_path: str, request: Request):
+    """旧文件路径重定向到 /files"""
+    # 路径参数已解码，重新编码避免文件名中的 %、?、# 被解析为转义、查询串或片段
+    # 查询串取自原始scope：request.url由解码后的路径拼成，文件名含?时其query会出错
+    url = f"/files/{quote(file_path)}"
+    query_string = request.scope.get("query_string", b"").decode("latin-1")
+    if query_string:
+        url += f"?{query_string}"
+    return RedirectResponse(url=url, status_code=308)
+
+# 固定内容的响应体，启动时序列化一次
+ROOT_RESPONSE_BODY = orjson.dumps({
+    "message": "AVD Web API 服务运行中",
+    "version": "2.0.0",
+    "docs_url": "/docs",
+    "status": "healthy"
+})
+HEALTH_RESPONSE_BODY = orjson.dumps({"status": "healthy", "message": "服务运行正常"})
 
 @app.get("/")
 async def root():
     """根路径，返回API信息"""
-    return {
-        "message": "AVD Web API 服务运行中",
-        "version": "2.0.0",
-        "docs_url": "/docs",
-        "status": "healthy"
-    }
+    return Response(ROOT_RESPONSE_BODY, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
     """健康检查端点"""
-    return {"status": "healthy", "message": "服务运行正常"}
+    return Response(HEALTH_RESPONSE_BODY, media_type="application/json")
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -118,32 +157,37 @@ async def websocket_endpoint(websocket: WebSocket):
             "message": "WebSocket连接成功"
         }, websocket)
         
+        loop = asyncio.get_running_loop()
         while True:
-            try:
-                # 接收客户端消息
-                data = await websocket.receive_text()
-                
-                try:
-                    message = json.loads(data)
-                    
-                    # 处理心跳
-                    if message.get('type') == 'ping':
-                        await websocket_manager.send_personal_message({
-                            "type": "pong",
-                            "timestamp": asyncio.get_event_loop().time()
-                        }, websocket)
-                        continue
-                        
-                    # 处理其他消息
-                    logger.debug(f"收到WebSocket消息: {message}")
-                    
-                except json.JSONDecodeError:
-                    logger.warning(f"无效的WebSocket消息格式: {data}")
-                    
-            except Exception as e:
-                logger.info(f"WebSocket连接断开: {connection_id}, 原因: {e}")
+            # 接收客户端消息，直接解析原始帧，避免 receive_text + json.loads 的二次解码
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
                 break
+            
+            data = frame.get("bytes") or frame.get("text")
+            if not data:
+                continue
+            
+            try:
+                message = orjson.loads(data)
+            except orjson.JSONDecodeError:
+                logger.warning(f"无效的WebSocket消息格式: {data}")
+                continue
+            
+            # 处理心跳
+            if isinstance(message, dict) and message.get('type') == 'ping':
+                await websocket.send_text(orjson.dumps({
+                    "type": "pong",
+                    "timestamp": loop.time()
+                }).decode())
+                continue
+            
+            # 处理其他消息
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"收到WebSocket消息: {message}")
                 
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         logger.error(f"WebSocket连接错误: {e}")
     finally:
@@ -151,6 +195,7 @@ async def websocket_endpoint(websocket: WebSocket):
         logger.info(f"WebSocket连接已清理: {connection_id}")
 
 if __name__ == "__main__":
+    # 单进程启动（开发/脚本启动），生产环境使用: gunicorn main:app -c gunicorn.conf.py
     # 配置文件监控排除目录，避免监控日志文件导致无限循环
     reload_dirs = [str(Path(__file__).parent)] if settings.DEBUG else None
     reload_excludes = [
@@ -174,4 +219,7 @@ if __name__ == "__main__":
         timeout_keep_alive=300,  # 保持连接5分钟
         timeout_graceful_shutdown=60,  # 优雅关闭超时1分钟
         limit_max_requests=None,  # 取消最大请求数限制
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop不支持Windows
+        http="httptools",
+        ws="websockets",  # permessage-deflate在uvicorn中默认启用
     ) 
\ No newline at end of file
@@ -6,34 +6,94 @@ AVD Web版本 - 下载API路由
 """
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 from pydantic import BaseModel, HttpUrl
+from sqlalchemy import select, func
 import uuid
 import os
 import tempfile
 from pathlib import Path
 from datetime import datetime
 import re
+import functools
 import urllib.parse
 import asyncio
 import logging
 import time
-from dataclasses import replace
+import orjson
 
 logger = logging.getLogger(__name__)
 
-from ...core.downloader import VideoDownloader
+from ...core.downloader import downloader_instance
 from ...core.downloaders.base_downloader import DownloadOptions
 from ...core.database import get_db
 from ...models.downloads import DownloadTask, DownloadStatus
 from ...core.websocket_manager import websocket_manager
+from ...core.cache import response_cache, make_cache_key
 from ...utils.validators import validate_url
 from ...core.config import settings, QUALITY_OPTIONS, SUPPORTED_PLATFORMS
 
 router = APIRouter()
 
-# Pydantic模型
+# 文件系统禁用字符和连续空白
+INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+WHITESPACE_RUN = re.compile(r'\s+')
+NON_ASCII_FILENAME_CHARS = re.compile(r'[^a-zA-Z0-9._-]')
+
+# 文件名最大字节数，约100个中文字符
+MAX_FILENAME_BYTES = 200
+
+# 流式下载的媒体类型，按 (格式, 仅音频) 预先生成
+MEDIA_TYPES = {
+    (fmt, audio_only): f"{'audio' if audio_only else 'video'}/{fmt}"
+    for fmt in settings.SUPPORTED_FORMATS
+    for audio_only in (False, True)
+}
+
+def sanitize_filename(filename: str) -> str:
+    """生成安全的文件名
+    
+    只移除文件系统禁用字符，保留中文、数字、字母、空格、连字符、下划线、括号等
+    """
+    safe_chars = INVALID_FILENAME_CHARS.sub('', filename)
+    # 将多个空格或特殊空白字符替换为单个空格
+    safe_chars = WHITESPACE_RUN.sub(' ', safe_chars).strip()
+    
+    # 按UTF-8字节长度截断，errors='ignore' 丢弃被截断的半个多字节字符
+    encoded = safe_chars.encode('utf-8')
+    if len(encoded) > MAX_FILENAME_BYTES:
+        safe_chars = encoded[:MAX_FILENAME_BYTES].decode('utf-8', 'ignore').strip()
+    
+    return safe_chars or "download"
+
+@functools.lru_cache(maxsize=1024)
+def build_content_disposition(filename: str) -> str:
+    """生成支持中文文件名的Content-Disposition（RFC 6266）
+    
+    响应头只能是latin-1，filename参数使用ASCII回退名，filename*携带UTF-8编码的原文件名
+    """
+    encoded_filename = urllib.parse.quote(filename.encode('utf-8'))
+    ascii_filename = NON_ASCII_FILENAME_CHARS.sub('_', filename)
+    return f'attachment; filename="{ascii_filename}"; filename*=UTF-8\'\'{encoded_filename}'
+
+class TempFileResponse(FileResponse):
+    """传输完成（或客户端断开）后删除文件的FileResponse"""
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+            logger.info(f"文件传输完成: {self.path}")
+        finally:
+            try:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                    logger.info(f"临时文件已清理: {self.path}")
+            except Exception as cleanup_error:
+                logger.error(f"清理临时文件失败: {cleanup_error}")
+
+# Pydantic模型（仅用于请求校验，响应直接由orjson序列化）
 class DownloadRequest(BaseModel):
     """下载请求模型"""
     url: HttpUrl
@@ -44,30 +104,6 @@ class DownloadRequest(BaseModel):
     subtitle_language: str = "auto"
     output_filename: Optional[str] = None
 
-class VideoInfoResponse(BaseModel):
-    """视频信息响应模型"""
-    title: str
-    description: Optional[str]
-    duration: Optional[int]
-    thumbnail: Optional[str]
-    uploader: Optional[str]
-    platform: str
-    available_qualities: List[str]
-    available_formats: List[str]
-
-class DownloadRecordResponse(BaseModel):
-    """下载记录响应模型"""
-    record_id: str
-    status: str
-    message: str
-
-class DownloadListResponse(BaseModel):
-    """下载列表响应模型"""
-    records: List[dict]
-    total: int
-    page: int
-    size: int
-
 class StreamDownloadRequest(BaseModel):
     """流式下载请求模型"""
     url: HttpUrl
@@ -76,23 +112,57 @@ class StreamDownloadRequest(BaseModel):
     audio_only: bool = False
     task_id: Optional[str] = None
 
+# 静态配置响应，启动时序列化一次
+PLATFORMS_RESPONSE_BODY = orjson.dumps({
+    "platforms": SUPPORTED_PLATFORMS,
+    "total": len(SUPPORTED_PLATFORMS)
+})
+
+QUALITY_OPTIONS_RESPONSE_BODY = orjson.dumps({
+    "qualities": QUALITY_OPTIONS,
+    "default": "best"
+})
+
+async def get_cached_video_info(url: str) -> Optional[dict]:
+    """获取视频信息（带缓存）
+    
+    先查缓存，未命中再调用下载器；下载器失败时返回过期的缓存数据
+    
+    Args:
+        url: 视频URL
+        
+    Returns:
+        视频信息字典，获取失败返回None
+    """
+    cache_key = make_cache_key("video_info", url)
+    video_info = await response_cache.get(cache_key)
+    if video_info is not None:
+        return video_info
+    
+    stale_key = make_cache_key("video_info_stale", url)
+    video_info = await downloader_instance.get_video_info(url)
+    if video_info:
+        await response_cache.set(cache_key, video_info, settings.VIDEO_INFO_CACHE_TTL)
+        await response_cache.set(stale_key, video_info, settings.VIDEO_INFO_STALE_TTL)
+        return video_info
+    
+    # 下载器失败时回退到过期数据
+    stale_info = await response_cache.get(stale_key)
+    if stale_info is not None:
+        logger.warning(f"获取视频信息失败，返回缓存数据: {url}")
+    return stale_info
+
 @router.get("/platforms")
 async def get_supported_platforms():
     """获取支持的平台列表"""
-    return {
-        "platforms": SUPPORTED_PLATFORMS,
-        "total": len(SUPPORTED_PLATFORMS)
-    }
+    return Response(PLATFORMS_RESPONSE_BODY, media_type="application/json")
 
 @router.get("/quality-options")
 async def get_quality_options():
     """获取可用的质量选项"""
-    return {
-        "qualities": QUALITY_OPTIONS,
-        "default": "best"
-    }
+    return Response(QUALITY_OPTIONS_RESPONSE_BODY, media_type="application/json")
 
-@router.post("/info", response_model=VideoInfoResponse)
+@router.post("/info", response_model=None)
 async def get_video_info(request: DownloadRequest):
     """获取视频信息
     
@@ -106,34 +176,33 @@ async def get_video_info(request: DownloadRequest):
         HTTPException: 当URL无效或获取信息失败时
     """
     try:
-        # 验证URL
+        # HttpUrl只校验语法，这里在查缓存和调用下载器之前检查协议和域名
         if not validate_url(str(request.url)):
             raise HTTPException(status_code=400, detail="无效的视频URL")
         
-        # 创建下载器实例
-        downloader = VideoDownloader()
-        
-        # 获取视频信息
-        video_info = await downloader.get_video_info(str(request.url))
+        # 获取视频信息（优先使用缓存）
+        video_info = await get_cached_video_info(str(request.url))
         
         if not video_info:
             raise HTTPException(status_code=404, detail="无法获取视频信息，请检查URL是否正确")
         
-        return VideoInfoResponse(
-            title=video_info.get("title", "未知标题"),
-            description=video_info.get("description"),
-            duration=int(video_info.get("duration", 0)) if video_info.get("duration") else None,
-            thumbnail=video_info.get("thumbnail"),
-            uploader=video_info.get("uploader"),
-            platform=video_info.get("platform", "unknown"),
-            available_qualities=video_info.get("available_qualities", []),
-            available_formats=video_info.get("available_formats", [])
-        )
+        return ORJSONResponse({
+            "title": video_info.get("title", "未知标题"),
+            "description": video_info.get("description"),
+            "duration": int(video_info.get("duration", 0)) if video_info.get("duration") else None,
+            "thumbnail": video_info.get("thumbnail"),
+            "uploader": video_info.get("uploader"),
+            "platform": video_info.get("platform", "unknown"),
+            "available_qualities": video_info.get("available_qualities", []),
+            "available_formats": video_info.get("available_formats", [])
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取视频信息失败: {str(e)}")
 
-@router.post("/record", response_model=DownloadRecordResponse)
+@router.post("/record", response_model=None)
 async def create_download_record(
     request: DownloadRequest,
     db = Depends(get_db)
@@ -157,8 +226,7 @@ async def create_download_record(
             raise HTTPException(status_code=400, detail="无效的质量选项")
         
         # 获取视频信息用于记录
-        downloader = VideoDownloader()
-        video_info = await downloader.get_video_info(str(request.url))
+        video_info = await get_cached_video_info(str(request.url))
         
         # 生成记录ID
         record_id = str(uuid.uuid4())
@@ -184,25 +252,27 @@ async def create_download_record(
             completed_at=datetime.utcnow()
         )
         
-        # 保存到数据库
+        # 保存到数据库（提交在线程池中执行，避免阻塞事件循环）
         db.add(record)
-        db.commit()
+        await run_in_threadpool(db.commit)
         
         logger.info(f"创建下载记录成功: {record_id}")
         
-        return DownloadRecordResponse(
-            record_id=record_id,
-            status="recorded",
-            message="下载记录已创建，可以使用流式下载获取文件"
-        )
+        return ORJSONResponse({
+            "record_id": record_id,
+            "status": "recorded",
+            "message": "下载记录已创建，可以使用流式下载获取文件"
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         logger.error(f"创建下载记录失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"创建下载记录失败: {str(e)}")
 
-@router.get("/records", response_model=DownloadListResponse)
-async def get_download_records(
+@router.get("/records", response_model=None)
+def get_download_records(
     page: int = Query(1, ge=1, description="页码"),
     size: int = Query(20, ge=1, le=100, description="每页大小"),
     platform: Optional[str] = Query(None, description="按平台筛选"),
@@ -220,54 +290,74 @@ async def get_download_records(
         分页的下载记录列表
     """
     try:
-        # 构建查询
-        query = db.query(DownloadTask)
+        # 只查询需要的列，并用窗口函数在同一条SQL中返回总数
+        query = select(
+            DownloadTask.id,
+            DownloadTask.url,
+            DownloadTask.title,
+            DownloadTask.description,
+            DownloadTask.thumbnail,
+            DownloadTask.uploader,
+            DownloadTask.platform,
+            DownloadTask.quality,
+            DownloadTask.format,
+            DownloadTask.audio_only,
+            DownloadTask.subtitle,
+            DownloadTask.status,
+            DownloadTask.created_at,
+            DownloadTask.completed_at,
+            func.count().over().label("total")
+        )
         
         if platform:
-            query = query.filter(DownloadTask.platform == platform)
-        
-        # 按创建时间倒序排列
-        query = query.order_by(DownloadTask.created_at.desc())
-        
-        # 计算总数
-        total = query.count()
-        
-        # 分页查询
-        records = query.offset((page - 1) * size).limit(size).all()
-        
-        # 转换为字典
-        record_list = []
-        for record in records:
-            record_dict = {
-                "id": record.id,
-                "url": record.url,
-                "title": record.title,
-                "description": record.description,
-                "thumbnail": record.thumbnail,
-                "uploader": record.uploader,
-                "platform": record.platform,
-                "quality": record.quality,
-                "format": record.format,
-                "audio_only": record.audio_only,
-                "subtitle": record.subtitle,
-                "status": record.status.value,
-                "created_at": record.created_at.isoformat(),
-                "completed_at": record.completed_at.isoformat() if record.completed_at else None
+            query = query.where(DownloadTask.platform == platform)
+        
+        # 按创建时间倒序排列并分页
+        query = query.order_by(DownloadTask.created_at.desc()).offset((page - 1) * size).limit(size)
+        
+        rows = db.execute(query).mappings().all()
+        
+        if rows:
+            total = rows[0]["total"]
+        else:
+            # 超出末页时窗口函数没有返回行，单独计算总数
+            count_query = select(func.count()).select_from(DownloadTask)
+            if platform:
+                count_query = count_query.where(DownloadTask.platform == platform)
+            total = db.execute(count_query).scalar() or 0
+        
+        record_list = [
+            {
+                "id": row["id"],
+                "url": row["url"],
+                "title": row["title"],
+                "description": row["description"],
+                "thumbnail": row["thumbnail"],
+                "uploader": row["uploader"],
+                "platform": row["platform"],
+                "quality": row["quality"],
+                "format": row["format"],
+                "audio_only": row["audio_only"],
+                "subtitle": row["subtitle"],
+                "status": row["status"].value,
+                "created_at": row["created_at"].isoformat(),
+                "completed_at": row["completed_at"].isoformat() if row["completed_at"] else None
             }
-            record_list.append(record_dict)
+            for row in rows
+        ]
         
-        return DownloadListResponse(
-            records=record_list,
-            total=total,
-            page=page,
-            size=size
-        )
+        return ORJSONResponse({
+            "records": record_list,
+            "total": total,
+            "page": page,
+            "size": size
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取记录列表失败: {str(e)}")
 
 @router.get("/records/{record_id}")
-async def get_download_record(record_id: str, db = Depends(get_db)):
+def get_download_record(record_id: str, db = Depends(get_db)):
     """获取特定下载记录的详细信息
     
     Args:
@@ -306,87 +396,78 @@ async def get_download_record(record_id: str, db = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取记录信息失败: {str(e)}")
 
-@router.delete("/records/{record_id}")
-async def delete_record(record_id: str, db = Depends(get_db)):
-    """删除下载记录
+# 批量删除需注册在 /records/{record_id} 之前，否则 "batch" 会被当作记录ID匹配
+@router.delete("/records/batch")
+def delete_records_batch(record_ids: List[str], db = Depends(get_db)):
+    """批量删除下载记录
     
     Args:
-        record_id: 记录ID
+        record_ids: 记录ID列表
         db: 数据库会话
         
     Returns:
-        删除结果
+        批量删除结果
     """
     try:
-        record = db.query(DownloadTask).filter(DownloadTask.id == record_id).first()
-        
-        if not record:
-            raise HTTPException(status_code=404, detail="下载记录不存在")
+        # 单条 DELETE ... WHERE id IN (...) 完成批量删除
+        unique_ids = list(set(record_ids))
+        deleted_count = 0
+        if unique_ids:
+            deleted_count = db.query(DownloadTask).filter(
+                DownloadTask.id.in_(unique_ids)
+            ).delete(synchronize_session=False)
+        failed_count = len(record_ids) - deleted_count
         
-        # 从数据库中删除记录
-        db.delete(record)
         db.commit()
         
-        logger.info(f"删除记录成功: {record_id}")
-        
         return {
             "success": True,
-            "message": "记录删除成功",
-            "record_id": record_id
+            "message": f"批量删除完成",
+            "deleted_count": deleted_count,
+            "failed_count": failed_count,
+            "total_count": len(record_ids)
         }
         
-    except HTTPException:
-        raise
     except Exception as e:
         db.rollback()
-        logger.error(f"删除记录失败: {record_id}, 错误: {e}")
-        raise HTTPException(status_code=500, detail=f"删除记录失败: {str(e)}")
+        logger.error(f"批量删除记录失败, 错误: {e}")
+        raise HTTPException(status_code=500, detail=f"批量删除失败: {str(e)}")
 
-@router.delete("/records/batch")
-async def delete_records_batch(record_ids: List[str], db = Depends(get_db)):
-    """批量删除下载记录
+@router.delete("/records/{record_id}")
+def delete_record(record_id: str, db = Depends(get_db)):
+    """删除下载记录
     
     Args:
-        record_ids: 记录ID列表
+        record_id: 记录ID
         db: 数据库会话
         
     Returns:
-        批量删除结果
+        删除结果
     """
     try:
-        deleted_count = 0
-        failed_count = 0
+        record = db.query(DownloadTask).filter(DownloadTask.id == record_id).first()
         
-        for record_id in record_ids:
-            try:
-                record = db.query(DownloadTask).filter(DownloadTask.id == record_id).first()
-                
-                if not record:
-                    failed_count += 1
-                    continue
-                
-                # 从数据库中删除记录
-                db.delete(record)
-                deleted_count += 1
-                
-            except Exception as e:
-                logger.error(f"删除单个记录失败: {record_id}, 错误: {e}")
-                failed_count += 1
+        if not record:
+            raise HTTPException(status_code=404, detail="下载记录不存在")
         
+        # 从数据库中删除记录
+        db.delete(record)
         db.commit()
         
+        logger.info(f"删除记录成功: {record_id}")
+        
         return {
             "success": True,
-            "message": f"批量删除完成",
-            "deleted_count": deleted_count,
-            "failed_count": failed_count,
-            "total_count": len(record_ids)
+            "message": "记录删除成功",
+            "record_id": record_id
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
-        logger.error(f"批量删除记录失败, 错误: {e}")
-        raise HTTPException(status_code=500, detail=f"批量删除失败: {str(e)}")
+        logger.error(f"删除记录失败: {record_id}, 错误: {e}")
+        raise HTTPException(status_code=500, detail=f"删除记录失败: {str(e)}")
 
 @router.post("/stream")
 async def stream_download_video(request: StreamDownloadRequest):
@@ -410,8 +491,7 @@ async def stream_download_video(request: StreamDownloadRequest):
         
         logger.info(f"开始服务器端下载: {request.url}")
         
-        # 创建下载器和选项
-        downloader = VideoDownloader()
+        # 创建下载选项
         options = DownloadOptions(
             quality=request.quality,
             format=request.format,
@@ -423,45 +503,17 @@ async def stream_download_video(request: StreamDownloadRequest):
         )
         
         # 获取视频信息
-        video_info = await downloader.get_video_info(str(request.url))
+        video_info = await get_cached_video_info(str(request.url))
         if not video_info:
             raise HTTPException(status_code=404, detail="无法获取视频信息")
         
         title = video_info.get("title", "download")
         
         # 生成安全的文件名（保留中文和更多有用字符）
-        def sanitize_filename(filename):
-            # 移除文件系统不支持的字符，但保留中文、数字、字母、空格、连字符、下划线、括号等
-            safe_chars = re.sub(r'[<>:"/\\|?*]', '', filename)  # 只移除文件系统禁用字符
-            # 将多个空格或特殊空白字符替换为单个空格
-            safe_chars = re.sub(r'\s+', ' ', safe_chars)
-            # 移除首尾空格
-            safe_chars = safe_chars.strip()
-            # 如果文件名为空，使用默认名称
-            if not safe_chars:
-                return "download"
-            # 限制长度（考虑中文字符，使用字节长度限制）
-            if len(safe_chars.encode('utf-8')) > 200:  # 限制为200字节，约100个中文字符
-                # 逐个字符添加，直到达到字节限制
-                result = ""
-                for char in safe_chars:
-                    test_result = result + char
-                    if len(test_result.encode('utf-8')) > 200:
-                        break
-                    result = test_result
-                safe_chars = result.strip()
-                if not safe_chars:
-                    return "download"
-            return safe_chars
-        
         safe_title = sanitize_filename(title)
         
-        # 创建临时文件
-        temp_file_suffix = f".{request.format}"
-        temp_fd, temp_file_path = tempfile.mkstemp(suffix=temp_file_suffix, prefix=f"{safe_title}_")
-        os.close(temp_fd)  # 关闭文件描述符，我们只需要路径
-        
-        logger.info(f"开始下载到临时文件: {temp_file_path}")
+        # 直接下载到临时目录，下载器返回实际文件路径，不再预先创建占位临时文件
+        logger.info(f"开始下载到临时目录: {options.output_path}")
         
         # 创建WebSocket进度回调函数
         task_id = request.task_id
@@ -469,18 +521,16 @@ async def stream_download_video(request: StreamDownloadRequest):
             """通过WebSocket发送进度更新"""
             if task_id:
                 try:
-                    logger.debug(f"WebSocket进度回调被调用 - 任务ID: {task_id}, 进度: {progress_data.get('progress', 0):.1f}%")
-                    # 直接发送格式化好的进度数据
+                    # 进度只进入发送队列（同一任务只保留最新一条），不会等待慢速客户端
                     await websocket_manager.send_download_progress(task_id, progress_data)
-                    logger.debug(f"发送进度更新: {task_id} - {progress_data.get('progress', 0)}%")
                     
                 except Exception as e:
                     logger.error(f"发送WebSocket进度更新失败: {e}")
         
         # 下载到服务器临时文件（带进度回调）
-        download_result = await downloader.download(
+        download_result = await downloader_instance.download(
             str(request.url), 
-            replace(options, output_path=os.path.dirname(temp_file_path)),
+            options,
             progress_callback=websocket_progress_callback if task_id else None,
             task_id=task_id
         )
@@ -516,7 +566,7 @@ async def stream_download_video(request: StreamDownloadRequest):
             
             raise HTTPException(status_code=500, detail="下载的文件不存在")
         
-        # 更新临时文件路径为实际路径
+        # 下载器生成的文件即为要传输的临时文件
         temp_file_path = actual_file_path
         
         # 发送下载完成的WebSocket消息
@@ -532,78 +582,31 @@ async def stream_download_video(request: StreamDownloadRequest):
         
         logger.info(f"服务器下载完成，开始传输给客户端: {temp_file_path}")
         
-        # 获取文件信息
-        file_size = os.path.getsize(temp_file_path)
         filename = f"{safe_title}.{request.format}"
-        
-        # 创建文件流传输生成器
-        async def file_stream_generator():
-            try:
-                chunk_size = 8192 * 8  # 64KB chunks for better performance
-                with open(temp_file_path, 'rb') as file:
-                    while True:
-                        chunk = file.read(chunk_size)
-                        if not chunk:
-                            break
-                        yield chunk
-                logger.info(f"文件传输完成: {filename}")
-            except Exception as e:
-                logger.error(f"文件传输过程中出错: {e}")
-                raise
-            finally:
-                # 传输完成后清理临时文件
-                try:
-                    if temp_file_path and os.path.exists(temp_file_path):
-                        os.remove(temp_file_path)
-                        logger.info(f"临时文件已清理: {temp_file_path}")
-                except Exception as cleanup_error:
-                    logger.error(f"清理临时文件失败: {cleanup_error}")
-        
-        # 设置响应头（支持中文文件名）
-        def encode_filename_for_download(filename):
-            """编码文件名以支持各种浏览器和中文字符"""
-            # 对于现代浏览器，使用 UTF-8 编码的文件名
-            try:
-                # 使用 RFC 6266 标准的编码方式
-                encoded_filename = urllib.parse.quote(filename.encode('utf-8'))
-                return f'attachment; filename="{filename}"; filename*=UTF-8\'\'{encoded_filename}'
-            except Exception:
-                # 如果编码失败，回退到简单的ASCII文件名
-                ascii_filename = re.sub(r'[^a-zA-Z0-9._-]', '_', filename)
-                return f'attachment; filename="{ascii_filename}"'
-        
-        response_headers = {
-            "Content-Disposition": encode_filename_for_download(filename),
-            "Content-Type": f"video/{request.format}" if not request.audio_only else f"audio/{request.format}",
-            "Content-Length": str(file_size),
-            "Cache-Control": "no-cache",
-            "Accept-Ranges": "bytes"
-        }
-        
-        return StreamingResponse(
-            file_stream_generator(),
-            media_type=f"video/{request.format}" if not request.audio_only else f"audio/{request.format}",
-            headers=response_headers
+        media_type = MEDIA_TYPES.get((request.format, request.audio_only)) \
+            or f"{'audio' if request.audio_only else 'video'}/{request.format}"
+        
+        # 使用FileResponse传输文件，读取在线程池中完成，不阻塞事件循环
+        return TempFileResponse(
+            temp_file_path,
+            media_type=media_type,
+            headers={
+                "Content-Disposition": build_content_disposition(filename),
+                "Cache-Control": "no-cache"
+            }
         )
         
-    except HTTPException:
-        # 如果是HTTP异常，清理临时文件后重新抛出
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-                logger.info(f"异常时清理临时文件: {temp_file_path}")
-            except:
-                pass
-        raise
     except Exception as e:
-        # 清理临时文件
+        # 文件交给响应之前出错时清理已下载的文件
         if temp_file_path and os.path.exists(temp_file_path):
             try:
                 os.remove(temp_file_path)
                 logger.info(f"异常时清理临时文件: {temp_file_path}")
-            except:
+            except OSError:
                 pass
         
+        if isinstance(e, HTTPException):
+            raise
         logger.error(f"流式下载失败: {e}")
         raise HTTPException(status_code=500, detail=f"下载失败: {str(e)}")
 
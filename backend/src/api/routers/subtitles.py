@@ -14,36 +14,88 @@ AVD Web版本 - 字幕处理API - 重写优化版
 - 自动资源管理
 """
 
-from fastapi import APIRouter, HTTPException, File, UploadFile, Depends
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import APIRouter, HTTPException, File, UploadFile, Depends, Request
+from fastapi.responses import StreamingResponse, FileResponse, Response
 from sqlalchemy.orm import Session
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import os
-import json
+import re
+import anyio
 import uuid
 import asyncio
 import time
 import logging
+import traceback
+import urllib.parse
+from collections import OrderedDict
 from pathlib import Path
-from datetime import datetime
 
 from ...core.config import settings
 from ...core.database import get_db, create_subtitle_processing_record
 from ...core.subtitle_processor import get_subtitle_processor_instance
+from ...core.websocket_manager import websocket_manager
 from ...utils.validators import validate_url
+from ...utils.filename_utils import UUID_STEM_PATTERN, load_mapping_info
+from ...utils.upload_utils import save_upload_streamed
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# 全局任务管理
-import traceback
+# 允许上传的文件类型
+VIDEO_EXTS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v'})
+SUBTITLE_EXTS = frozenset({'.srt', '.vtt', '.ass', '.ssa', '.sub'})
+ALLOWED_EXTS = VIDEO_EXTS | SUBTITLE_EXTS
+
+# 字幕文件下载的媒体类型
+SUBTITLE_MEDIA_TYPES = {
+    '.srt': 'application/x-subrip',
+    '.vtt': 'text/vtt',
+    '.ass': 'text/x-ass',
+    '.ssa': 'text/x-ssa',
+    '.sub': 'text/plain',
+}
+
+# 导入时确保文件目录存在，上传时无需重复创建
+Path(settings.FILES_PATH).mkdir(parents=True, exist_ok=True)
 
+# 任务保留策略：最多保留的任务数、结束任务的保留时间和清理间隔
+MAX_TASKS = 10000
+TASK_TTL_SECONDS = 3600
+TASK_SWEEP_INTERVAL = 60
+TERMINAL_STATUSES = frozenset({'completed', 'failed', 'cancelled'})
+
+# 进度推送节流：进度变化不足1%且距上次推送不足250ms时不推送（状态/消息变化总是推送），
+# 被节流的最新进度在窗口结束时补发
+PROGRESS_PUSH_MIN_DELTA = 1
+PROGRESS_PUSH_INTERVAL = 0.25
+
+def get_processor(request: Request):
+    """获取应用启动时创建的字幕处理器（依赖注入）"""
+    return request.app.state.subtitle_processor
+
+# 全局任务管理
 class SimpleTaskManager:
     def __init__(self):
-        self.tasks = {}  # task_id -> task_info
+        self.tasks: "OrderedDict[str, dict]" = OrderedDict()  # task_id -> task_info，按最近更新排序
+        self._finished: "OrderedDict[str, None]" = OrderedDict()  # 已结束的任务ID，按结束顺序排列
+        self._sweeper: Optional[asyncio.Task] = None
+        self._task_locks: Dict[str, asyncio.Lock] = {}  # task_id -> 任务级锁，保证同一任务的更新和推送顺序
+        self._trailing_pushes: Dict[str, asyncio.Task] = {}  # task_id -> 节流窗口结束时补发最新进度的协程
     
     def create_task(self, task_id: str, operation: str, params: dict) -> dict:
-        """创建新任务"""
+        """创建新任务
+        
+        任务数达到上限时淘汰最早结束的任务；运行中和排队中的任务不会被淘汰，
+        没有可淘汰的任务时拒绝创建
+        
+        Raises:
+            HTTPException: 任务数已达上限且没有已结束的任务（503）
+        """
+        if len(self.tasks) >= MAX_TASKS:
+            if not self._finished:
+                raise HTTPException(status_code=503, detail="当前任务过多，请稍后重试")
+            self.cleanup_task(next(iter(self._finished)))
+        
         task_info = {
             'task_id': task_id,
             'operation': operation,
@@ -53,26 +105,112 @@ class SimpleTaskManager:
             'message': '准备开始...',
             'start_time': time.time(),
             'error': None,
-            'result': None
+            'result': None,
+            'end_time': None
         }
         self.tasks[task_id] = task_info
+        
+        # 首次使用时启动后台清理
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_expired_tasks())
+        
         return task_info
     
+    async def _sweep_expired_tasks(self):
+        """定期清理结束超过TTL的任务"""
+        while True:
+            await asyncio.sleep(TASK_SWEEP_INTERVAL)
+            now = time.time()
+            expired = [
+                task_id for task_id, task_info in self.snapshot_tasks()
+                if task_info['status'] in TERMINAL_STATUSES
+                and task_info.get('end_time') and now - task_info['end_time'] > TASK_TTL_SECONDS
+            ]
+            for task_id in expired:
+                self.cleanup_task(task_id)
+            if expired:
+                logger.info(f"已清理 {len(expired)} 个过期任务")
+    
+    def _get_task_lock(self, task_id: str) -> asyncio.Lock:
+        """获取任务级锁（按需创建）"""
+        lock = self._task_locks.get(task_id)
+        if lock is None:
+            lock = self._task_locks[task_id] = asyncio.Lock()
+        return lock
+    
     async def update_task(self, task_id: str, **updates):
         """更新任务状态并推送到前端"""
-        if task_id in self.tasks:
-            self.tasks[task_id].update(updates)
+        if task_id not in self.tasks:
+            return
+        
+        async with self._get_task_lock(task_id):
+            task_info = self.tasks.get(task_id)
+            if task_info is None:
+                return
+            
+            task_info.update(updates)
             
             # 添加时间戳
-            self.tasks[task_id]['timestamp'] = time.time()
+            task_info['timestamp'] = time.time()
+            if task_info['status'] in TERMINAL_STATUSES:
+                if not task_info.get('end_time'):
+                    task_info['end_time'] = task_info['timestamp']
+                self._finished.setdefault(task_id, None)
+            else:
+                self._finished.pop(task_id, None)
+            self.tasks.move_to_end(task_id)
             
-            # 推送进度到WebSocket
-            await self._send_progress_update(task_id, self.tasks[task_id])
+            # 推送进度到WebSocket（高频进度更新合并节流）
+            if self._should_push(task_info):
+                await self._push(task_id, task_info)
+            elif task_id not in self._trailing_pushes:
+                # 被节流的更新在窗口结束时补发，避免前端停在过期的进度上
+                delay = PROGRESS_PUSH_INTERVAL - (task_info['timestamp'] - task_info['last_push'][0])
+                self._trailing_pushes[task_id] = asyncio.create_task(self._trailing_push(task_id, delay))
+    
+    async def _push(self, task_id: str, task_info: dict):
+        """记录本次推送的状态并推送到前端（调用方持有任务级锁）"""
+        task_info['last_push'] = (
+            task_info['timestamp'], task_info['progress'],
+            task_info['message'], task_info['status']
+        )
+        await self._send_progress_update(task_id, task_info)
+    
+    async def _trailing_push(self, task_id: str, delay: float):
+        """节流窗口结束后，如果最新的更新还没有推送过则补发"""
+        try:
+            await asyncio.sleep(max(0.0, delay))
+            if task_id not in self.tasks:
+                return
+            async with self._get_task_lock(task_id):
+                task_info = self.tasks.get(task_id)
+                if task_info is not None and task_info['timestamp'] > task_info['last_push'][0]:
+                    await self._push(task_id, task_info)
+        finally:
+            if self._trailing_pushes.get(task_id) is asyncio.current_task():
+                del self._trailing_pushes[task_id]
+    
+    @staticmethod
+    def _should_push(task_info: dict) -> bool:
+        """判断本次更新是否需要推送到前端"""
+        last_push = task_info.get('last_push')
+        if last_push is None or task_info['status'] in TERMINAL_STATUSES:
+            return True
+        
+        last_time, last_progress, last_message, last_status = last_push
+        return (
+            task_info['status'] != last_status
+            or task_info['message'] != last_message
+            or abs(task_info['progress'] - last_progress) >= PROGRESS_PUSH_MIN_DELTA
+            or task_info['timestamp'] - last_time >= PROGRESS_PUSH_INTERVAL
+        )
     
     async def _send_progress_update(self, task_id: str, task_info: dict):
         """发送进度更新到WebSocket - 增强版本"""
         try:
-            from ...core.websocket_manager import websocket_manager
+            # 没有前端连接时跳过中间进度，终态仍然推送
+            if task_info.get('status') not in TERMINAL_STATUSES and not websocket_manager.has_subscribers():
+                return
             
             progress_data = {
                 'task_id': task_id,
@@ -102,13 +240,12 @@ class SimpleTaskManager:
                 logger.error(f"❌ 已推送失败状态: {task_id} -> {progress_data['error']}")
             elif task_info.get('status') == 'completed':
                 logger.info(f"✅ 已推送完成状态: {task_id} -> {progress_data['progress']}%")
-            else:
+            elif logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"📊 已推送进度状态: {task_id} -> {progress_data['progress']}% - {progress_data['message']}")
             
         except Exception as e:
             logger.error(f"推送进度更新失败: {e}")
             # 如果WebSocket推送失败，记录详细错误信息
-            import traceback
             logger.error(f"推送错误详情: {traceback.format_exc()}")
     
     def get_task(self, task_id: str) -> Optional[dict]:
@@ -124,51 +261,59 @@ class SimpleTaskManager:
         """取消任务"""
         if task_id in self.tasks:
             self.tasks[task_id]['status'] = 'cancelled'
+            self.tasks[task_id]['end_time'] = time.time()
+            self._finished.setdefault(task_id, None)
             return True
         return False
     
     def cleanup_task(self, task_id: str):
         """清理任务"""
         self.tasks.pop(task_id, None)
+        self._task_locks.pop(task_id, None)
+        self._finished.pop(task_id, None)
+        trailing = self._trailing_pushes.pop(task_id, None)
+        if trailing is not None:
+            trailing.cancel()
+    
+    def snapshot_tasks(self) -> List[Tuple[str, dict]]:
+        """获取任务列表快照，遍历期间不受任务增删影响"""
+        return list(self.tasks.items())
 
 # 全局任务管理器实例
 task_manager = SimpleTaskManager()
 
-def get_original_title_from_file_path(file_path: str) -> str:
+async def get_original_title_from_file_path(file_path: str) -> str:
     """从文件路径获取原始标题"""
     try:
         if not file_path:
             return "untitled"
             
         # 获取文件基本信息
-        file_stem = Path(file_path).stem
+        file_stem = os.path.splitext(os.path.basename(file_path))[0]
         file_dir = os.path.dirname(file_path)
         
         # 检查是否是UUID格式的文件名
-        import re
-        uuid_pattern = r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
-        if re.match(uuid_pattern, file_stem, re.IGNORECASE):
+        if UUID_STEM_PATTERN.match(file_stem):
             # 是UUID文件名，从映射文件获取原始标题
             mapping_file = os.path.join(file_dir, f"{file_stem}_mapping.json")
-            if os.path.exists(mapping_file):
-                try:
-                    with open(mapping_file, 'r', encoding='utf-8') as f:
-                        mapping_info = json.load(f)
-                        original_title = mapping_info.get('original_title')
-                        if original_title:
-                            logger.info(f"从映射文件获取原始标题: {original_title}")
-                            return original_title
-                        
-                        # 如果没有original_title，使用original_filename去除扩展名
-                        original_filename = mapping_info.get('original_filename')
-                        if original_filename:
-                            original_title = Path(original_filename).stem
-                            logger.info(f"从原始文件名提取标题: {original_title}")
-                            return original_title
-                except Exception as e:
-                    logger.warning(f"读取映射文件失败: {e}")
-            else:
-                logger.warning(f"映射文件不存在: {mapping_file}")
+            try:
+                mapping_info = await load_mapping_info(mapping_file)
+                if mapping_info is None:
+                    logger.warning(f"映射文件不存在: {mapping_file}")
+                else:
+                    original_title = mapping_info.get('original_title')
+                    if original_title:
+                        logger.info(f"从映射文件获取原始标题: {original_title}")
+                        return original_title
+                    
+                    # 如果没有original_title，使用original_filename去除扩展名
+                    original_filename = mapping_info.get('original_filename')
+                    if original_filename:
+                        original_title = os.path.splitext(os.path.basename(original_filename))[0]
+                        logger.info(f"从原始文件名提取标题: {original_title}")
+                        return original_title
+            except Exception as e:
+                logger.warning(f"读取映射文件失败: {e}")
         
         # 如果不是UUID或没有映射文件，直接使用文件名
         return file_stem
@@ -201,62 +346,20 @@ async def upload_file(file: UploadFile = File(...)):
     try:
         logger.info(f"开始上传文件: {file.filename}")
         
-        if not file or not file.filename:
-            raise HTTPException(status_code=400, detail="没有选择文件")
-        
-        # 检查文件类型
-        video_exts = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v'}
-        subtitle_exts = {'.srt', '.vtt', '.ass', '.ssa', '.sub'}
-        allowed_exts = video_exts | subtitle_exts
-        
-        file_ext = Path(file.filename).suffix.lower()
-        if file_ext not in allowed_exts:
-            raise HTTPException(status_code=400, detail="不支持的文件格式")
-        
-        # 生成文件ID和路径
-        file_id = str(uuid.uuid4())
-        filename = f"{file_id}{file_ext}"
-        file_path = os.path.join(settings.FILES_PATH, filename)
-        
-        # 确保目录存在
-        os.makedirs(settings.FILES_PATH, exist_ok=True)
-        
-        # 保存文件
-        content = await file.read()
-        if len(content) == 0:
-            raise HTTPException(status_code=400, detail="上传的文件为空")
-        
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
-        
-        # 保存文件映射信息
-        original_title = Path(file.filename).stem
-        mapping_file = os.path.join(settings.FILES_PATH, f"{file_id}_mapping.json")
-        mapping_info = {
-            "original_filename": file.filename,
-            "original_title": original_title,
-            "uuid_filename": filename,
-            "file_path": file_path,
-            "upload_time": datetime.utcnow().isoformat(),
-            "file_size": len(content),
-            "file_type": "video" if file_ext in video_exts else "subtitle"
-        }
-        
-        with open(mapping_file, 'w', encoding='utf-8') as f:
-            json.dump(mapping_info, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"文件上传成功: {file_path}")
+        file_id, mapping_info = await save_upload_streamed(
+            file, settings.FILES_PATH, ALLOWED_EXTS, VIDEO_EXTS
+        )
         
         return {
             "success": True,
             "message": "文件上传成功",
             "file_id": file_id,
-            "filename": filename,
-            "original_filename": file.filename,
-            "original_title": original_title,
-            "file_path": file_path,
+            "filename": mapping_info["uuid_filename"],
+            "original_filename": mapping_info["original_filename"],
+            "original_title": mapping_info["original_title"],
+            "file_path": mapping_info["file_path"],
             "file_type": mapping_info["file_type"],
-            "size": len(content)
+            "size": mapping_info["file_size"]
         }
         
     except HTTPException:
@@ -286,8 +389,10 @@ async def process_subtitle(request: dict):
         # 创建任务
         task_info = task_manager.create_task(task_id, operation, request)
         
-        # 异步执行处理
-        asyncio.create_task(_execute_subtitle_processing(task_id, operation, request))
+        # 放入处理队列，由固定数量的工作协程执行
+        queue = _ensure_processing_workers()
+        queued_task_ids[task_id] = None
+        queue.put_nowait((task_id, operation, request))
         
         return {
             "success": True,
@@ -302,6 +407,55 @@ async def process_subtitle(request: dict):
         logger.error(f"创建字幕处理任务失败: {e}")
         raise HTTPException(status_code=500, detail=f"创建任务失败: {str(e)}")
 
+# 字幕处理队列和工作协程（首次提交任务时启动），限制同时运行的处理任务数
+processing_queue: Optional[asyncio.Queue] = None
+processing_workers: List[asyncio.Task] = []
+# 按入队顺序记录仍在队列中的任务ID，排队位置在查询状态时实时计算
+queued_task_ids: Dict[str, None] = {}
+
+def _ensure_processing_workers() -> asyncio.Queue:
+    """获取处理队列，并确保工作协程数量达到配置值"""
+    global processing_queue
+    if processing_queue is None:
+        processing_queue = asyncio.Queue()
+    
+    alive_workers = [worker for worker in processing_workers if not worker.done()]
+    for _ in range(settings.SUBTITLE_MAX_CONCURRENT_TASKS - len(alive_workers)):
+        alive_workers.append(asyncio.create_task(_processing_worker(processing_queue)))
+    processing_workers[:] = alive_workers
+    
+    return processing_queue
+
+def _get_queue_position(task_id: str) -> Optional[int]:
+    """计算任务当前的排队位置（从1开始），已取消或已清理的任务不占位置，不在队列中时返回None"""
+    if task_id not in queued_task_ids:
+        return None
+    
+    position = 1
+    for queued_id in queued_task_ids:
+        if queued_id == task_id:
+            return position
+        queued_info = task_manager.get_task(queued_id)
+        if queued_info is not None and queued_info['status'] == 'pending':
+            position += 1
+    return None
+
+async def _processing_worker(queue: asyncio.Queue):
+    """字幕处理工作协程"""
+    while True:
+        task_id, operation, request = await queue.get()
+        queued_task_ids.pop(task_id, None)
+        try:
+            task_info = task_manager.get_task(task_id)
+            # 排队期间被取消或已被清理的任务直接跳过
+            if task_info is None or task_info['status'] == 'cancelled':
+                continue
+            await _execute_subtitle_processing(task_id, operation, request)
+        except Exception as e:
+            logger.error(f"字幕处理工作协程异常: {task_id} - {e}")
+        finally:
+            queue.task_done()
+
 async def _execute_subtitle_processing(task_id: str, operation: str, request: dict):
     """执行字幕处理的后台任务 - 增强错误处理版本"""
     try:
@@ -321,7 +475,7 @@ async def _execute_subtitle_processing(task_id: str, operation: str, request: di
                         status='failed',
                         progress=0, 
                         error=message,
-                        message=f"处理失败: {message}"
+                        message=message
                     )
                 else:
                     await task_manager.update_task(
@@ -331,7 +485,8 @@ async def _execute_subtitle_processing(task_id: str, operation: str, request: di
                         status='running' if progress < 100 else 'completed'
                     )
                     
-                logger.debug(f"任务 {task_id} 进度更新: {progress}% - {message}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"任务 {task_id} 进度更新: {progress}% - {message}")
             except Exception as e:
                 logger.error(f"进度回调失败: {e}")
         
@@ -377,11 +532,11 @@ async def _execute_subtitle_processing(task_id: str, operation: str, request: di
             if not os.path.isabs(video_file_path):
                 video_file_path = os.path.join(settings.FILES_PATH, video_file_path)
             
-            if not os.path.exists(video_file_path):
+            if not await anyio.Path(video_file_path).exists():
                 raise ValueError("视频文件不存在")
             
             # 获取原始文件标题
-            original_title = get_original_title_from_file_path(video_file_path)
+            original_title = await get_original_title_from_file_path(video_file_path)
             logger.info(f"使用原始标题生成字幕: {original_title}")
             
             await progress_callback(10, '从文件生成字幕...')
@@ -417,11 +572,11 @@ async def _execute_subtitle_processing(task_id: str, operation: str, request: di
             if not os.path.isabs(subtitle_file_path):
                 subtitle_file_path = os.path.join(settings.FILES_PATH, subtitle_file_path)
             
-            if not os.path.exists(subtitle_file_path):
+            if not await anyio.Path(subtitle_file_path).exists():
                 raise ValueError("字幕文件不存在")
             
             # 获取原始文件标题
-            original_title = get_original_title_from_file_path(subtitle_file_path)
+            original_title = await get_original_title_from_file_path(subtitle_file_path)
             logger.info(f"使用原始标题翻译字幕: {original_title}")
             
             await progress_callback(10, '翻译字幕...')
@@ -504,6 +659,12 @@ async def get_task_status(task_id: str):
             "elapsed_time": elapsed_time
         }
         
+        # 排队中的任务返回队列位置
+        if task_info['status'] == 'pending':
+            queue_position = _get_queue_position(task_id)
+            if queue_position is not None:
+                response['queue_position'] = queue_position
+        
         # 添加错误信息
         if task_info.get('error'):
             response['error'] = task_info['error']
@@ -533,36 +694,48 @@ async def get_task_status(task_id: str):
         logger.error(f"获取任务状态失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取状态失败: {str(e)}")
 
+def _content_disposition(filename: str) -> str:
+    """生成下载响应的Content-Disposition
+    
+    可打印、不含引号和反斜杠的ASCII文件名直接放入filename参数；其他情况（包括CR/LF等控制字符）
+    与FileResponse一致，使用RFC 5987的filename*编码
+    """
+    if filename.isascii() and filename.isprintable() and '"' not in filename and '\\' not in filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename*=utf-8''{urllib.parse.quote(filename)}"
+
 @router.get("/download/{filename}")
 async def download_subtitle_file(filename: str):
     """下载字幕文件"""
     try:
         file_path = os.path.join(settings.FILES_PATH, filename)
         
-        if not os.path.exists(file_path):
+        if not await anyio.Path(file_path).exists():
             raise HTTPException(status_code=404, detail="文件不存在")
         
         # 获取原始文件名
         original_filename = filename
-        file_stem = Path(filename).stem
+        file_stem, file_ext = os.path.splitext(filename)
         
         # 尝试从映射文件获取原始标题
         try:
             mapping_file = os.path.join(settings.FILES_PATH, f"{file_stem}_mapping.json")
-            if os.path.exists(mapping_file):
-                with open(mapping_file, 'r', encoding='utf-8') as f:
-                    mapping_info = json.load(f)
-                    original_title = mapping_info.get('original_title', file_stem)
-                    file_ext = Path(filename).suffix
-                    original_filename = f"{original_title}{file_ext}"
+            mapping_info = await load_mapping_info(mapping_file)
+            if mapping_info is not None:
+                original_title = mapping_info.get('original_title', file_stem)
+                original_filename = f"{original_title}{file_ext}"
         except Exception:
             pass
         
-        return FileResponse(
-            path=file_path,
-            filename=original_filename,
-            media_type='text/plain'
-        )
+        media_type = SUBTITLE_MEDIA_TYPES.get(file_ext.lower(), 'text/plain')
+        headers = {'content-disposition': _content_disposition(original_filename)}
+        
+        # 部署在nginx之后时由nginx直接发送文件，不占用应用worker
+        if settings.USE_X_ACCEL:
+            headers['X-Accel-Redirect'] = f"{settings.X_ACCEL_PREFIX}{urllib.parse.quote(os.path.basename(file_path))}"
+            return Response(media_type=media_type, headers=headers)
+        
+        return FileResponse(path=file_path, media_type=media_type, headers=headers)
         
     except HTTPException:
         raise
@@ -570,25 +743,20 @@ async def download_subtitle_file(filename: str):
         logger.error(f"下载文件失败: {e}")
         raise HTTPException(status_code=500, detail=f"下载失败: {str(e)}")
 
+def _cancel(task_id: str) -> dict:
+    """取消任务并生成响应"""
+    success = task_manager.cancel_task(task_id)
+    return {
+        "success": success,
+        "message": f"任务 {task_id} 已取消" if success else f"任务 {task_id} 不存在或无法取消",
+        "task_id": task_id
+    }
+
 @router.post("/cancel/{task_id}")
 async def cancel_task(task_id: str):
     """取消任务"""
     try:
-        success = task_manager.cancel_task(task_id)
-        
-        if success:
-            return {
-                "success": True,
-                "message": f"任务 {task_id} 已取消",
-                "task_id": task_id
-            }
-        else:
-            return {
-                "success": False,
-                "message": f"任务 {task_id} 不存在或无法取消",
-                "task_id": task_id
-            }
-        
+        return _cancel(task_id)
     except Exception as e:
         logger.error(f"取消任务失败: {e}")
         raise HTTPException(status_code=500, detail=f"取消任务失败: {str(e)}")
@@ -596,37 +764,16 @@ async def cancel_task(task_id: str):
 @router.post("/cancel-task")
 async def cancel_task_legacy(request: dict):
     """取消任务 - 兼容旧版本前端"""
-    try:
-        task_id = request.get('task_id')
-        if not task_id:
-            raise HTTPException(status_code=400, detail="缺少task_id参数")
-        
-        # 调用已有的取消任务函数
-        success = task_manager.cancel_task(task_id)
-        
-        if success:
-            return {
-                "success": True,
-                "message": f"任务 {task_id} 已取消",
-                "task_id": task_id
-            }
-        else:
-            return {
-                "success": False,
-                "message": f"任务 {task_id} 不存在或无法取消",
-                "task_id": task_id
-            }
-            
-    except Exception as e:
-        logger.error(f"取消任务失败: {e}")
-        raise HTTPException(status_code=500, detail=f"取消任务失败: {str(e)}")
+    task_id = request.get('task_id')
+    if not task_id:
+        raise HTTPException(status_code=400, detail="缺少task_id参数")
+    
+    return await cancel_task(task_id)
 
 @router.get("/config")
-async def get_subtitle_config():
+async def get_subtitle_config(processor = Depends(get_processor)):
     """获取字幕处理配置信息"""
     try:
-        processor = get_subtitle_processor_instance()
-        
         return {
             "success": True,
             "config": {
@@ -659,7 +806,7 @@ async def get_active_tasks():
     """获取所有活跃任务"""
     try:
         tasks = []
-        for task_id, task_info in task_manager.tasks.items():
+        for task_id, task_info in task_manager.snapshot_tasks():
             elapsed_time = time.time() - task_info['start_time']
             tasks.append({
                 "task_id": task_id,
@@ -686,7 +833,7 @@ async def cleanup_completed_tasks():
     try:
         completed_statuses = ['completed', 'failed', 'cancelled']
         task_ids_to_remove = [
-            task_id for task_id, task_info in task_manager.tasks.items()
+            task_id for task_id, task_info in task_manager.snapshot_tasks()
             if task_info['status'] in completed_statuses
         ]
         
@@ -4,13 +4,11 @@
 
 from fastapi import APIRouter, HTTPException, File, UploadFile
 from pathlib import Path
-import uuid
 import os
-import json
-from datetime import datetime
 import logging
 
 from ....core.config import settings
+from ....utils.upload_utils import save_upload_streamed
 from .subtitle_info import router as info_router
 from .subtitle_files import router as files_router
 from .subtitle_tasks import router as tasks_router
@@ -20,6 +18,14 @@ from .subtitle_settings import router as settings_router
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 允许上传的文件类型
+SUBTITLE_EXTENSIONS = frozenset({'.srt', '.vtt', '.ass', '.ssa', '.sub'})
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v', '.3gp'})
+ALLOWED_EXTENSIONS = SUBTITLE_EXTENSIONS | VIDEO_EXTENSIONS
+
+# 导入时确保文件目录存在，上传时无需重复创建
+Path(settings.FILES_PATH).mkdir(parents=True, exist_ok=True)
+
 # 包含所有子模块的路由
 router.include_router(info_router, prefix="/info", tags=["字幕信息"])
 router.include_router(files_router, prefix="/files", tags=["字幕文件"])
@@ -48,70 +54,21 @@ async def upload_subtitle_file(file: UploadFile = File(...)):
     try:
         logger.info(f"开始上传文件: {file.filename}, 类型: {file.content_type}")
         
-        # 检查文件是否存在
-        if not file or not file.filename:
-            logger.error("没有接收到文件或文件名为空")
-            raise HTTPException(status_code=400, detail="没有选择文件")
-        
-        # 检查文件类型
-        subtitle_extensions = {'.srt', '.vtt', '.ass', '.ssa', '.sub'}
-        video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v', '.3gp'}
-        allowed_extensions = subtitle_extensions | video_extensions
-        
-        file_ext = Path(file.filename).suffix.lower()
-        
-        if file_ext not in allowed_extensions:
-            raise HTTPException(status_code=400, detail="不支持的文件格式")
-        
-        # 生成唯一文件名
-        file_id = str(uuid.uuid4())
-        filename = f"{file_id}{file_ext}"
-        file_path = os.path.join(settings.FILES_PATH, filename)
-        
-        # 确保文件目录存在
-        os.makedirs(settings.FILES_PATH, exist_ok=True)
-        
-        # 保存文件
-        content = await file.read()
-        
-        if len(content) == 0:
-            raise HTTPException(status_code=400, detail="上传的文件为空")
-        
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
-        
-        # 创建文件名映射文件
-        original_filename = file.filename
-        original_title = Path(original_filename).stem  # 去掉扩展名作为标题
-        
-        # 在同一目录下保存映射信息
-        mapping_file = os.path.join(settings.FILES_PATH, f"{file_id}_mapping.json")
-        mapping_info = {
-            "original_filename": original_filename,
-            "original_title": original_title,
-            "uuid_filename": filename,
-            "file_path": file_path,
-            "upload_time": datetime.utcnow().isoformat(),
-            "file_size": len(content)
-        }
-        
-        with open(mapping_file, 'w', encoding='utf-8') as f:
-            json.dump(mapping_info, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"文件保存成功: {file_path}")
-        logger.info(f"映射信息保存成功: {mapping_file}")
+        file_id, mapping_info = await save_upload_streamed(
+            file, settings.FILES_PATH, ALLOWED_EXTENSIONS, VIDEO_EXTENSIONS
+        )
         
-        file_type = "视频文件" if file_ext in video_extensions else "字幕文件"
+        file_type = "视频文件" if mapping_info["file_type"] == "video" else "字幕文件"
         
         return {
             "message": f"{file_type}上传成功",
-            "file_path": file_path,
-            "filename": filename,
-            "original_filename": original_filename,
-            "original_title": original_title,
+            "file_path": mapping_info["file_path"],
+            "filename": mapping_info["uuid_filename"],
+            "original_filename": mapping_info["original_filename"],
+            "original_title": mapping_info["original_title"],
             "file_id": file_id,
             "file_type": file_type,
-            "size": len(content)
+            "size": mapping_info["file_size"]
         }
         
     except HTTPException:
@@ -0,0 +1,55 @@
+"""
+字幕静态信息常量
+
+语言列表、模型说明、翻译方法等只读数据，导入时生成一次，各路由直接返回同一对象
+"""
+
+from typing import Any, Dict
+
+# 支持的字幕语言
+SUBTITLE_LANGUAGES: Dict[str, str] = {
+    "zh": "中文",
+    "en": "英语",
+    "ja": "日语",
+    "ko": "韩语",
+    "fr": "法语",
+    "de": "德语",
+    "es": "西班牙语",
+    "it": "意大利语",
+    "pt": "葡萄牙语",
+    "ru": "俄语",
+    "ar": "阿拉伯语",
+    "hi": "印地语"
+}
+
+# 可用的AI模型及说明
+MODEL_DESCRIPTIONS: Dict[str, str] = {
+    "tiny": "最快，准确度最低 (50MB)",
+    "base": "平衡选择 (150MB)",
+    "small": "较好准确度 (250MB)",
+    "medium": "高准确度 (800MB)",
+    "large": "最高准确度 (1.5GB)"
+}
+
+LANGUAGES_RESPONSE: Dict[str, Any] = {
+    "languages": SUBTITLE_LANGUAGES,
+    "default": "auto"
+}
+
+MODELS_RESPONSE: Dict[str, Any] = {
+    "models": MODEL_DESCRIPTIONS,
+    "default": "base"
+}
+
+TRANSLATION_METHODS_RESPONSE: Dict[str, Any] = {
+    "methods": {
+        "sentencepiece": {
+            "name": "SentencePiece翻译",
+            "description": "高质量本地翻译方法",
+            "offline": True,
+            "speed": "快速",
+            "quality": "高"
+        }
+    },
+    "default": "sentencepiece"
+}
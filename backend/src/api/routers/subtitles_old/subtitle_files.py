@@ -4,80 +4,84 @@
 包含文件上传、下载等文件操作功能
 """
 
-from fastapi import APIRouter, HTTPException, File, UploadFile
-from fastapi.responses import StreamingResponse
-import uuid
+from fastapi import APIRouter, HTTPException, File, UploadFile, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import os
+import time
+import uuid
 import tempfile
-import json
+import urllib.parse
 from pathlib import Path
+from typing import Optional, Tuple
 import logging
 
 from ....core.config import settings
+from ....utils.filename_utils import load_mapping_info, save_mapping_info
+from ....utils.fs_utils import open_async, run_fs
+from ....utils.http_range import file_validators, if_range_matches, parse_range
+from ....utils.upload_utils import stream_upload_to_file
 from .subtitle_utils import encode_filename_for_download
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# 允许上传的文件类型
+ALLOWED_EXTENSIONS = frozenset({
+    # 字幕文件
+    '.srt', '.vtt', '.ass', '.ssa', '.sub', '.idx', '.sup',
+    # 视频文件
+    '.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.3gp',
+    # 音频文件
+    '.mp3', '.wav', '.m4a', '.aac', '.ogg', '.wma', '.flac'
+})
+ALLOWED_EXTENSIONS_TEXT = ', '.join(sorted(ALLOWED_EXTENSIONS))
+
+# Range响应按块读取的大小
+RANGE_CHUNK_SIZE = 64 * 1024
+
+# 目录中字幕文件列表的扫描结果：(目录mtime_ns, 目录, 字幕文件路径)，目录中增删文件后mtime变化，缓存自动失效
+# 只缓存文件列表，每次查找仍重新stat各字幕文件，原地改写的文件也能按最新修改时间选出
+_subtitle_listing: Tuple[int, Optional[Path], Tuple[str, ...]] = (-1, None, ())
+
+# 目录mtime距今小于该值时不缓存：粗粒度mtime的文件系统上，同一时间刻度内的新增文件不会改变目录mtime
+MTIME_GRANULARITY_NS = 2_000_000_000
+
 
 @router.post("/upload")
 async def upload_subtitle_file(file: UploadFile = File(...)):
     """上传字幕文件或视频文件"""
     try:
         # 验证文件类型
-        allowed_extensions = {
-            # 字幕文件
-            '.srt', '.vtt', '.ass', '.ssa', '.sub', '.idx', '.sup',
-            # 视频文件  
-            '.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.3gp',
-            # 音频文件
-            '.mp3', '.wav', '.m4a', '.aac', '.ogg', '.wma', '.flac'
-        }
-        
         file_ext = Path(file.filename or '').suffix.lower()
-        if file_ext not in allowed_extensions:
+        if file_ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400, 
-                detail=f"不支持的文件类型: {file_ext}. 支持的类型: {', '.join(allowed_extensions)}"
-            )
-        
-        # 检查文件大小 (最大1GB)
-        max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
-        file_content = await file.read()
-        if len(file_content) > max_size:
-            raise HTTPException(
-                status_code=413,
-                detail=f"文件过大，最大支持 {settings.MAX_FILE_SIZE_MB}MB"
+                detail=f"不支持的文件类型: {file_ext}. 支持的类型: {ALLOWED_EXTENSIONS_TEXT}"
             )
         
         # 生成唯一文件名
-        file_id = str(uuid.uuid4())
+        file_id = uuid.uuid4().hex
         safe_filename = f"{file_id}{file_ext}"
         file_path = Path(settings.FILES_PATH) / safe_filename
         
-        # 确保目录存在
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # 保存文件
-        with open(file_path, 'wb') as f:
-            f.write(file_content)
+        # 分块流式保存文件，超过大小限制 (最大1GB) 时中止并删除不完整的文件
+        max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+        file_size = await stream_upload_to_file(file, str(file_path), max_size, drop_cache=True)
         
         # 保存文件映射信息
         mapping_info = {
             'original_filename': file.filename,
-            'upload_time': str(Path(file_path).stat().st_mtime),
-            'file_size': len(file_content),
+            'upload_time': str((await run_fs(os.stat, file_path)).st_mtime),
+            'file_size': file_size,
             'file_type': file_ext,
             'content_type': file.content_type
         }
         
         mapping_file = file_path.parent / f"{file_id}_mapping.json"
-        with open(mapping_file, 'w', encoding='utf-8') as f:
-            json.dump(mapping_info, f, ensure_ascii=False, indent=2)
+        await save_mapping_info(mapping_file, mapping_info)
         
-        logger.info(f"开始上传文件: {file.filename}, 类型: {file.content_type}")
-        logger.info(f"文件保存成功: {file_path}")
-        logger.info(f"映射信息保存成功: {mapping_file}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"文件上传成功: {file.filename} ({file.content_type}, {file_size} 字节) -> {file_path}")
         
         return {
             "success": True,
@@ -85,7 +89,7 @@ async def upload_subtitle_file(file: UploadFile = File(...)):
             "file_id": file_id,
             "file_path": str(file_path),
             "original_filename": file.filename,
-            "file_size": len(file_content),
+            "file_size": file_size,
             "file_type": file_ext
         }
         
@@ -96,105 +100,154 @@ async def upload_subtitle_file(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"文件上传失败: {str(e)}")
 
 
+def _find_subtitle_file(temp_files_dir: Path, record_id: str) -> Optional[Tuple[Path, os.stat_result]]:
+    """查找记录对应的字幕文件，找不到时返回目录中最新的字幕文件
+    
+    同时返回文件的stat结果，供响应直接使用，避免重复stat
+    """
+    # 优先查找翻译后的字幕文件（带_zh_subtitles或_subtitles后缀）
+    possible_patterns = [
+        f"{record_id}_zh_subtitles.srt",  # 翻译后的中文字幕
+        f"{record_id}_subtitles.srt",     # 原始字幕
+        f"{record_id}.srt"                # 简单格式
+    ]
+    
+    for pattern in possible_patterns:
+        try:
+            return temp_files_dir / pattern, os.stat(os.path.join(temp_files_dir, pattern))
+        except FileNotFoundError:
+            continue
+    
+    # 如果没有找到特定文件，查找最新的字幕文件（目录未变化时跳过目录遍历，只stat已知的字幕文件）
+    global _subtitle_listing
+    dir_mtime_ns = temp_files_dir.stat().st_mtime_ns
+    cached_mtime_ns, cached_dir, subtitle_paths = _subtitle_listing
+    if cached_mtime_ns != dir_mtime_ns or cached_dir != temp_files_dir:
+        # os.scandir按名称字符串过滤，不为每个目录项创建Path对象
+        with os.scandir(temp_files_dir) as entries:
+            subtitle_paths = tuple(entry.path for entry in entries if entry.name.endswith('.srt'))
+        if time.time_ns() - dir_mtime_ns >= MTIME_GRANULARITY_NS:
+            _subtitle_listing = (dir_mtime_ns, temp_files_dir, subtitle_paths)
+    
+    latest_path = None
+    latest_stat = None
+    for path in subtitle_paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if latest_stat is None or stat.st_mtime > latest_stat.st_mtime:
+            latest_path, latest_stat = path, stat
+    
+    return (Path(latest_path), latest_stat) if latest_path is not None else None
+
+
+async def _iter_file_range(file_path: str, start: int, end: int):
+    """按块读取文件的指定范围"""
+    remaining = end - start + 1
+    async with open_async(file_path, 'rb') as f:
+        await f.seek(start)
+        while remaining > 0:
+            chunk = await f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
 @router.get("/download/{record_id}")
-async def download_processed_file(record_id: str):
+async def download_processed_file(record_id: str, request: Request):
     """下载处理完成的字幕文件"""
     try:
-        # 在临时文件目录中查找相关的字幕文件
+        # 在临时文件目录中查找相关的字幕文件（目录扫描在文件操作线程池中执行，不阻塞事件循环）
         temp_files_dir = Path(settings.FILES_PATH)
+        found = await run_fs(_find_subtitle_file, temp_files_dir, record_id)
         
-        # 优先查找翻译后的字幕文件（带_zh_subtitles或_subtitles后缀）
-        possible_patterns = [
-            f"{record_id}_zh_subtitles.srt",  # 翻译后的中文字幕
-            f"{record_id}_subtitles.srt",     # 原始字幕
-            f"{record_id}.srt"                # 简单格式
-        ]
-        
-        target_file = None
-        for pattern in possible_patterns:
-            file_path = temp_files_dir / pattern
-            if file_path.exists():
-                target_file = file_path
-                break
-        
-        # 如果没有找到特定文件，查找最新的字幕文件
-        if not target_file:
-            srt_files = list(temp_files_dir.glob("*.srt"))
-            if srt_files:
-                target_file = max(srt_files, key=lambda f: f.stat().st_mtime)
-        
-        if not target_file or not target_file.exists():
+        if not found:
             raise HTTPException(status_code=404, detail="文件不存在或已被清理")
         
+        target_file, file_stat = found
+        
         temp_file_path = str(target_file)
         
         # 生成更友好的文件名
         filename = target_file.name
         
         # 尝试从映射文件获取原始文件名 - 增强版本
+        # 映射文件解析结果按mtime缓存，重复下载（浏览器重试、续传）不再读取和解析文件
         mapping_file = temp_files_dir / f"{record_id}_mapping.json"
-        if mapping_file.exists():
-            try:
-                with open(mapping_file, 'r', encoding='utf-8') as f:
-                    mapping_info = json.load(f)
-                    original_name = mapping_info.get('original_filename', filename)
-                    if original_name:
-                        # 清理原始文件名，移除扩展名获取基本名称
-                        base_name = Path(original_name).stem
-                        
-                        # 根据字幕文件类型构造友好的下载文件名
-                        if '_zh_subtitles' in filename or '_zh_en_subtitles' in filename:
-                            filename = f"{base_name}_中文字幕.srt"
-                        elif '_subtitles' in filename:
-                            filename = f"{base_name}_字幕.srt"
-                        else:
-                            filename = f"{base_name}_字幕.srt"
-                        
-                        logger.info(f"使用原始文件名: {original_name} -> {filename}")
-                    else:
-                        # 尝试使用original_title字段
-                        original_title = mapping_info.get('original_title', '')
-                        if original_title:
-                            base_name = original_title.strip()
-                            filename = f"{base_name}_字幕.srt"
-                            logger.info(f"使用原始标题: {original_title} -> {filename}")
-            except Exception as e:
-                logger.warning(f"读取映射文件失败: {e}")
-        else:
-            logger.warning(f"映射文件不存在: {mapping_file}")
-        
-        file_size = os.path.getsize(temp_file_path)
-        
-        # 创建文件流（不自动删除文件，保留一段时间供重复下载）
-        async def file_generator():
-            try:
-                chunk_size = 8192
-                total_bytes_sent = 0
-                with open(temp_file_path, 'rb') as file:
-                    while True:
-                        chunk = file.read(chunk_size)
-                        if not chunk:
-                            break
-                        yield chunk
-                        total_bytes_sent += len(chunk)
+        try:
+            mapping_info = await load_mapping_info(mapping_file)
+            if mapping_info is None:
+                logger.warning(f"映射文件不存在: {mapping_file}")
+            elif not isinstance(mapping_info, dict):
+                # 内容能解析但不是对象（如列表）时按格式错误处理，使用原文件名
+                logger.warning(f"映射文件格式无效: {mapping_file}")
+            else:
+                original_name = mapping_info.get('original_filename', filename)
+                if original_name:
+                    # 清理原始文件名，移除扩展名获取基本名称
+                    base_name = Path(original_name).stem
                 
-                logger.info(f"文件下载完成: {filename} (共传输 {total_bytes_sent} 字节)")
+                    # 根据字幕文件类型构造友好的下载文件名
+                    if '_zh_subtitles' in filename or '_zh_en_subtitles' in filename:
+                        filename = f"{base_name}_中文字幕.srt"
+                    elif '_subtitles' in filename:
+                        filename = f"{base_name}_字幕.srt"
+                    else:
+                        filename = f"{base_name}_字幕.srt"
                 
-            except Exception as e:
-                logger.error(f"文件下载出错: {str(e)}")
-                raise
+                    logger.info(f"使用原始文件名: {original_name} -> {filename}")
+                else:
+                    # 尝试使用original_title字段
+                    original_title = mapping_info.get('original_title', '')
+                    if original_title:
+                        base_name = original_title.strip()
+                        filename = f"{base_name}_字幕.srt"
+                        logger.info(f"使用原始标题: {original_title} -> {filename}")
+        except (OSError, ValueError) as e:
+            # 只处理读取失败和JSON格式错误（orjson.JSONDecodeError是ValueError的子类）
+            logger.warning(f"读取映射文件失败: {e}")
         
-        # 返回文件响应
         response_headers = {
             "Content-Disposition": encode_filename_for_download(filename),
-            "Content-Type": "text/plain; charset=utf-8",
-            "Content-Length": str(file_size),
-            "Cache-Control": "no-cache"
+            "Cache-Control": "no-cache",
+            "Accept-Ranges": "bytes",
+            # 断点续传的客户端用ETag/Last-Modified确认文件未变化（If-Range）
+            **file_validators(file_stat)
         }
         
-        return StreamingResponse(
-            file_generator(),
-            media_type="application/octet-stream",
+        # 由nginx直接发送文件，不占用应用worker
+        if settings.USE_X_ACCEL:
+            response_headers["X-Accel-Redirect"] = (
+                f"{settings.X_ACCEL_PREFIX}{urllib.parse.quote(target_file.name)}"
+            )
+            return Response(
+                media_type="text/plain; charset=utf-8",
+                headers=response_headers
+            )
+        
+        # 断点续传：按Range返回206部分内容；If-Range不匹配（文件已变化）时返回完整文件
+        range_header = request.headers.get("range")
+        if range_header and if_range_matches(request.headers.get("if-range"), file_stat):
+            byte_range = parse_range(range_header, file_stat.st_size)
+            if byte_range is not None:
+                start, end = byte_range
+                response_headers["Content-Range"] = f"bytes {start}-{end}/{file_stat.st_size}"
+                response_headers["Content-Length"] = str(end - start + 1)
+                return StreamingResponse(
+                    _iter_file_range(temp_file_path, start, end),
+                    status_code=206,
+                    media_type="text/plain; charset=utf-8",
+                    headers=response_headers
+                )
+        
+        # 使用FileResponse传输文件（不自动删除文件，保留一段时间供重复下载）
+        # Content-Length等响应头直接使用查找时的stat结果，读取在线程池中完成，不阻塞事件循环
+        return FileResponse(
+            temp_file_path,
+            stat_result=file_stat,
+            media_type="text/plain; charset=utf-8",
             headers=response_headers
         )
         
@@ -3,14 +3,16 @@
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
+from pydantic import BaseModel, Field
 import uuid
 import os
-import json
+import re
+import urllib.parse
+import orjson
 import asyncio
-import threading
 import time
 import logging
 from pathlib import Path
@@ -18,59 +20,157 @@ from pathlib import Path
 from ....core.config import settings
 from ....core.database import get_db, create_subtitle_processing_record
 from ....core.subtitle_processor import get_subtitle_processor_instance
-from ....core.downloader import VideoDownloader
+from ....core.task_manager import get_task_manager
 from ....utils.validators import validate_url
+from ....utils.fs_utils import run_fs
+from ....utils.filename_utils import UUID_STEM_PATTERN, load_mapping_info_sync
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+class StreamRequest(BaseModel):
+    """流式字幕处理请求模型（generate需要video_url或video_file_path，translate需要字幕路径和目标语言）"""
+    operation: str = Field(..., min_length=1)
+    video_url: Optional[str] = None
+    video_file_path: Optional[str] = None
+    subtitle_file_path: Optional[str] = None
+    language: str = 'auto'
+    source_language: str = 'auto'
+    target_language: Optional[str] = None
+    model_size: str = 'large-v3'
+    quality_mode: str = 'balance'  # quality/balance/speed
+    translation_method: str = 'optimized'  # optimized/enhanced/basic
+
+class BurnRequest(BaseModel):
+    """字幕烧录请求模型"""
+    video_file_path: str = Field(..., min_length=1)
+    subtitle_file_path: str = Field(..., min_length=1)
+    output_filename: str = 'output_with_subtitles.mp4'
+
+class GenerateFromUrlRequest(BaseModel):
+    """从URL生成字幕请求模型"""
+    video_url: str = Field(..., min_length=1)
+    language: str = 'auto'
+    model_size: str = 'large-v3'  # 默认使用最新模型
+    target_language: Optional[str] = None  # 翻译目标语言
+    quality_mode: str = 'balance'
+
+class GenerateFromFileRequest(BaseModel):
+    """从文件生成字幕请求模型"""
+    video_file_path: str = Field(..., min_length=1)
+    language: str = 'auto'
+    model_size: str = 'large-v3'
+    target_language: Optional[str] = None
+    quality_mode: str = 'balance'
+
+class TranslateRequest(BaseModel):
+    """翻译字幕请求模型"""
+    subtitle_file_path: str = Field(..., min_length=1)
+    target_language: str = Field(..., min_length=1)
+    source_language: str = 'auto'
+    translation_method: str = 'optimized'
+    quality_mode: str = 'balance'
+
 # 全局任务管理器
 class TaskManager:
+    """任务管理器
+    
+    非线程安全：所有调用方都是运行在同一事件循环线程上的异步处理函数，只能在事件循环中调用
+    """
+    
     def __init__(self):
-        self.active_tasks = {}  # task_id -> {"status": "running|cancelled|completed", "thread": thread_obj}
-        self.lock = threading.Lock()
+        self.active_tasks = {}  # task_id -> {"status": "running|cancelled|completed", "task": asyncio.Task}
     
-    def start_task(self, task_id: str, thread_obj=None):
-        with self.lock:
-            self.active_tasks[task_id] = {
-                "status": "running",
-                "thread": thread_obj,
-                "start_time": time.time()
-            }
+    def start_task(self, task_id: str, task: Optional[asyncio.Task] = None):
+        self.active_tasks[task_id] = {
+            "status": "running",
+            "task": task,
+            "start_time": time.time()
+        }
     
     def cancel_task(self, task_id: str):
-        with self.lock:
-            if task_id in self.active_tasks:
-                self.active_tasks[task_id]["status"] = "cancelled"
-                return True
+        entry = self.active_tasks.get(task_id)
+        if entry is None:
             return False
+        entry["status"] = "cancelled"
+        # 登记了asyncio任务时直接取消，处理协程在下一个await处收到CancelledError
+        task = entry.get("task")
+        if task is not None and not task.done():
+            task.cancel()
+        return True
     
     def complete_task(self, task_id: str):
-        with self.lock:
-            if task_id in self.active_tasks:
-                self.active_tasks[task_id]["status"] = "completed"
+        if task_id in self.active_tasks:
+            self.active_tasks[task_id]["status"] = "completed"
     
     def is_cancelled(self, task_id: str):
-        with self.lock:
-            return self.active_tasks.get(task_id, {}).get("status") == "cancelled"
+        return self.active_tasks.get(task_id, {}).get("status") == "cancelled"
     
     def cleanup_task(self, task_id: str):
-        with self.lock:
-            self.active_tasks.pop(task_id, None)
+        self.active_tasks.pop(task_id, None)
     
     def get_active_tasks(self):
-        with self.lock:
-            return list(self.active_tasks.keys())
+        return list(self.active_tasks)
 
 # 全局任务管理器实例
 task_manager = TaskManager()
 
-# 支持的字幕语言映射
-SUBTITLE_LANGUAGES = {
-    'zh': '中文', 'en': '英语', 'ja': '日语', 'ko': '韩语', 
-    'fr': '法语', 'de': '德语', 'es': '西班牙语', 'it': '意大利语',
-    'pt': '葡萄牙语', 'ru': '俄语', 'ar': '阿拉伯语', 'hi': '印地语'
-}
+class ProgressState:
+    """SSE进度状态，状态变化时通知等待中的推送协程（替代定时轮询）
+    
+    只保存最新的进度和结果，不缓存历史更新：客户端读取缓慢时中间进度被覆盖，
+    每个连接的内存占用固定；完成/失败状态不会被覆盖，最终帧一定会发送
+    """
+    
+    def __init__(self):
+        self.cond = asyncio.Condition()
+        self.version = 0  # 每次更新递增，推送协程据此判断是否有新状态
+        self.progress = 0
+        self.message = '初始化...'
+        self.is_completed = False
+        self.has_error = False
+        self.error_message = ''
+        self.final_frames = ()  # 处理任务结束时生成的最终SSE帧，推送协程直接发送
+    
+    @property
+    def finished(self) -> bool:
+        return self.is_completed or self.has_error
+    
+    async def update(self, **changes):
+        """更新状态并唤醒等待的推送协程"""
+        async with self.cond:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.version += 1
+            self.cond.notify_all()
+    
+    async def wait_changed(self, last_version: int) -> int:
+        """等待状态更新，返回最新版本号（两次等待之间的多次更新合并为一次）"""
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.version != last_version)
+            return self.version
+    
+    async def wait_finished(self):
+        """等待任务完成或失败"""
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.finished)
+
+# SSE帧
+SSE_PING_INTERVAL = 15  # 保活注释帧间隔（秒）
+SSE_MIN_INTERVAL = 0.1  # 进度帧最小推送间隔（秒），密集更新时合并
+SSE_PING = b": ping\n\n"
+SSE_DONE = b"data: [DONE]\n\n"
+
+def _sse_event(data: dict) -> bytes:
+    """编码SSE数据帧（orjson直接输出UTF-8字节）"""
+    return b"data: " + orjson.dumps(data, default=str) + b"\n\n"
+
+async def _aexists(path: str) -> bool:
+    """在文件操作线程池中检查路径是否存在，网络文件系统上stat较慢时不阻塞事件循环"""
+    return await run_fs(os.path.exists, path)
+
+# 字幕文件扩展名（仅匹配结尾，文件名中间出现的".srt"不受影响）
+SRT_SUFFIX_PATTERN = re.compile(r'\.srt$', re.IGNORECASE)
 
 def get_original_title_from_path(file_path: str) -> str:
     """从文件路径获取原始标题，优先使用映射文件信息"""
@@ -83,24 +183,20 @@ def get_original_title_from_path(file_path: str) -> str:
         file_stem = Path(file_path).stem
         
         # 检查是否是UUID格式的文件名
-        import re
-        uuid_pattern = r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
-        uuid_match = re.match(uuid_pattern, file_stem, re.IGNORECASE)
+        uuid_match = UUID_STEM_PATTERN.match(file_stem)
         
         if uuid_match:
             # 如果是UUID文件名，尝试从映射文件获取原始标题
             uuid_part = uuid_match.group(0)
             mapping_file = os.path.join(file_dir, f"{uuid_part}_mapping.json")
             
-            if os.path.exists(mapping_file):
-                try:
-                    with open(mapping_file, 'r', encoding='utf-8') as f:
-                        mapping_info = json.load(f)
-                        original_title = mapping_info.get('original_title')
-                        if original_title:
-                            return original_title
-                except Exception as e:
-                    logger.warning(f"读取映射文件失败: {e}")
+            try:
+                # 解析结果按mtime缓存，文件不存在时返回None
+                mapping_info = load_mapping_info_sync(mapping_file)
+                if mapping_info is not None and mapping_info.get('original_title'):
+                    return mapping_info['original_title']
+            except Exception as e:
+                logger.warning(f"读取映射文件失败: {e}")
             
             # 如果映射文件不存在，使用默认标题
             return "video"
@@ -112,27 +208,76 @@ def get_original_title_from_path(file_path: str) -> str:
         logger.error(f"获取原始标题失败: {e}")
         return "untitled"
 
+# 字幕生成来源 -> (处理器方法名, 来源参数名, 进度提示)
+_GENERATE_HANDLERS = {
+    'url': ('process_from_url', 'video_url', "从URL生成字幕..."),
+    'file': ('process_from_file', 'video_file_path', "从文件生成字幕..."),
+}
+
+async def _run_generate(processor, kind: str, source: str, request: StreamRequest, task_id: str, update_progress):
+    """按来源类型执行字幕生成"""
+    method_name, source_arg, message = _GENERATE_HANDLERS[kind]
+    await update_progress(10, message)
+    return await getattr(processor, method_name)(
+        **{source_arg: source},
+        source_language=request.language,
+        model_size=request.model_size,
+        target_language=request.target_language,
+        quality_mode=request.quality_mode,
+        task_id=task_id,
+        progress_callback=update_progress
+    )
+
+def _completion_frames(result_data: dict) -> tuple:
+    """根据处理结果生成最终SSE帧（完成帧 + [DONE]，或错误帧）"""
+    # 准备下载信息
+    subtitle_file = result_data.get('subtitle_file') or result_data.get('translated_file')
+    if not subtitle_file:
+        return (_sse_event({'error': '未找到字幕文件', 'status': 'error'}),)
+    
+    # 生成下载文件名
+    title = result_data.get('title', 'subtitle')
+    target_lang = result_data.get('target_language', '')
+    if target_lang:
+        download_filename = f"{title}_{target_lang}.srt"
+    else:
+        download_filename = f"{title}.srt"
+    
+    # 记录ID由处理器返回，旧结果回退到从文件名提取
+    record_id = result_data.get('record_id') or SRT_SUFFIX_PATTERN.sub('', os.path.basename(subtitle_file))
+    
+    completion_data = {
+        'progress': 100,
+        'message': '处理完成!',
+        'status': 'completed',
+        'download_ready': True,
+        'record_id': record_id,
+        'filename': download_filename,
+        'subtitle_file': subtitle_file,
+        'duration': result_data.get('duration'),
+        'quality_info': result_data.get('quality_info', ''),
+        'model_used': result_data.get('model_used', ''),
+    }
+    return (_sse_event(completion_data), SSE_DONE)
+
 @router.post("/stream")
-async def stream_subtitle_processing(request: dict, db: Session = Depends(get_db)):
+async def stream_subtitle_processing(request: StreamRequest, db: Session = Depends(get_db)):
     """流式字幕处理 - 重写版本，使用SSE实时推送进度"""
     
-    # 验证基本参数
-    operation = request.get('operation')
-    if not operation:
-        raise HTTPException(status_code=400, detail="缺少operation参数")
+    operation = request.operation
     
-    # 生成任务ID
-    task_id = str(uuid.uuid4())
+    # 生成任务ID，随初始帧返回给客户端用于 /cancel-task
+    task_id = uuid.uuid4().hex
     
     # 进度状态管理
-    progress_state = {
-        'current_progress': 0,
-        'current_message': '初始化...',
-        'is_completed': False,
-        'has_error': False,
-        'error_message': '',
-        'result_data': None
-    }
+    state = ProgressState()
+
+    async def _fail(message: str):
+        """标记任务失败并生成错误帧"""
+        await state.update(
+            has_error=True, error_message=message,
+            final_frames=(_sse_event({'error': message, 'status': 'error'}),)
+        )
 
     async def execute_subtitle_task():
         """执行字幕处理任务的核心逻辑"""
@@ -141,57 +286,33 @@ async def stream_subtitle_processing(request: dict, db: Session = Depends(get_db
             
             # 更新进度的辅助函数
             async def update_progress(progress: float, message: str = ""):
-                progress_state['current_progress'] = min(max(float(progress), 0), 100)
-                progress_state['current_message'] = message
+                await state.update(progress=min(max(float(progress), 0), 100), message=message)
                 
             await update_progress(5, "开始处理...")
             
             if operation == 'generate':
-                # 字幕生成
-                video_url = request.get('video_url')
-                video_file_path = request.get('video_file_path')
-                language = request.get('language', 'auto')
-                model_size = request.get('model_size', 'large-v3')
-                target_language = request.get('target_language')
-                quality_mode = request.get('quality_mode', 'balance')
+                # 字幕生成：URL和文件来源共用同一个执行入口
+                video_url = request.video_url
+                video_file_path = request.video_file_path
                 
                 if video_url:
-                    # 从URL生成
-                    await update_progress(10, "从URL生成字幕...")
-                    result = await processor.process_from_url(
-                        video_url=video_url,
-                        source_language=language,
-                        model_size=model_size,
-                        target_language=target_language,
-                        quality_mode=quality_mode,
-                        task_id=task_id
-                    )
+                    kind, source = 'url', video_url
                 elif video_file_path:
-                    # 从文件生成
-                    await update_progress(10, "从文件生成字幕...")
-                    
+                    kind = 'file'
                     # 构建完整路径
-                    if not os.path.isabs(video_file_path):
-                        video_file_path = os.path.join(settings.FILES_PATH, video_file_path)
-                    
-                    result = await processor.process_from_file(
-                        video_file_path=video_file_path,
-                        source_language=language,
-                        model_size=model_size,
-                        target_language=target_language,
-                        quality_mode=quality_mode,
-                        task_id=task_id
-                    )
+                    source = video_file_path if os.path.isabs(video_file_path) else os.path.join(settings.FILES_PATH, video_file_path)
                 else:
                     raise ValueError("缺少video_url或video_file_path参数")
+                
+                result = await _run_generate(processor, kind, source, request, task_id, update_progress)
                     
             elif operation == 'translate':
                 # 字幕翻译
-                subtitle_file_path = request.get('subtitle_file_path')
-                source_language = request.get('source_language', 'auto')
-                target_language = request.get('target_language')
-                translation_method = request.get('translation_method', 'optimized')
-                quality_mode = request.get('quality_mode', 'balance')
+                subtitle_file_path = request.subtitle_file_path
+                source_language = request.source_language
+                target_language = request.target_language
+                translation_method = request.translation_method
+                quality_mode = request.quality_mode
                 
                 if not subtitle_file_path:
                     raise ValueError("缺少subtitle_file_path参数")
@@ -214,133 +335,118 @@ async def stream_subtitle_processing(request: dict, db: Session = Depends(get_db
             else:
                 raise ValueError(f"不支持的操作类型: {operation}")
             
-            # 检查处理结果
+            # 检查处理结果，直接生成最终帧，推送协程被唤醒后立即发送，无需再等待任务结束
             if result.get('success'):
-                await update_progress(100, "处理完成!")
-                progress_state['result_data'] = result
-                progress_state['is_completed'] = True
+                await state.update(progress=100, message="处理完成!", final_frames=_completion_frames(result), is_completed=True)
             else:
-                progress_state['has_error'] = True
-                progress_state['error_message'] = result.get('error', '处理失败')
+                await _fail(result.get('error', '处理失败'))
                 
+        except asyncio.CancelledError:
+            # 任务被取消（客户端断开或/cancel-task），通知推送协程后继续传播取消
+            await _fail('任务已取消')
+            raise
         except Exception as e:
             logger.error(f"字幕处理任务失败: {e}")
-            progress_state['has_error'] = True
-            progress_state['error_message'] = str(e)
+            await _fail(str(e))
 
     async def progress_stream():
         """生成SSE进度流"""
+        task = None
         try:
-            # 发送初始状态
-            yield f"data: {json.dumps({'progress': 0, 'message': '初始化...', 'status': 'processing'})}\n\n"
-            
-            # 启动处理任务
+            # 启动处理任务并登记，/cancel-task 可直接取消
             task = asyncio.create_task(execute_subtitle_task())
+            task_manager.start_task(task_id, task)
+            
+            # 发送初始状态
+            yield _sse_event({'progress': 0, 'message': '初始化...', 'status': 'processing', 'task_id': task_id})
             
-            # 监控进度并发送更新
-            last_progress = -1
-            last_message = ""
+            # 等待状态变化后推送，不再定时轮询
+            loop = asyncio.get_running_loop()
+            last_version = 0
+            last_progress = 0
+            last_message = '初始化...'
+            last_emit = 0.0
             
-            while not progress_state['is_completed'] and not progress_state['has_error']:
-                current_progress = progress_state['current_progress']
-                current_message = progress_state['current_message']
+            while not state.finished:
+                try:
+                    last_version = await asyncio.wait_for(
+                        state.wait_changed(last_version), SSE_PING_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    # 长时间无进度时发送注释帧保活，避免代理超时断开
+                    yield SSE_PING
+                    continue
+                if state.finished:
+                    break
                 
-                # 只有进度或消息发生变化时才发送更新
-                if current_progress != last_progress or current_message != last_message:
-                    yield f"data: {json.dumps({'progress': current_progress, 'message': current_message, 'status': 'processing'})}\n\n"
-                    last_progress = current_progress
-                    last_message = current_message
+                # 距上次推送不足最小间隔时，合并这段时间内的更新只推送最新状态（任务结束时立即推送）
+                delay = last_emit + SSE_MIN_INTERVAL - loop.time()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(state.wait_finished(), delay)
+                        break
+                    except asyncio.TimeoutError:
+                        pass
                 
-                await asyncio.sleep(0.5)  # 每0.5秒检查一次
+                # 只有进度或消息发生变化时才发送更新
+                if state.progress != last_progress or state.message != last_message:
+                    last_progress = state.progress
+                    last_message = state.message
+                    last_emit = loop.time()
+                    yield _sse_event({'progress': last_progress, 'message': last_message, 'status': 'processing'})
             
-            # 等待任务完成
-            await task
+            # 发送处理任务生成的最终结果
+            for frame in state.final_frames:
+                yield frame
             
-            # 发送最终结果
-            if progress_state['has_error']:
-                yield f"data: {json.dumps({'error': progress_state['error_message'], 'status': 'error'})}\n\n"
-            else:
-                result_data = progress_state['result_data']
-                if result_data and result_data.get('success'):
-                    # 准备下载信息
-                    subtitle_file = result_data.get('subtitle_file') or result_data.get('translated_file')
-                    if subtitle_file:
-                        # 生成下载文件名
-                        title = result_data.get('title', 'subtitle')
-                        target_lang = result_data.get('target_language', '')
-                        if target_lang:
-                            download_filename = f"{title}_{target_lang}.srt"
-                        else:
-                            download_filename = f"{title}.srt"
-                        
-                        # 从文件路径提取记录ID
-                        record_id = os.path.basename(subtitle_file).replace('.srt', '')
-                        
-                        completion_data = {
-                            'progress': 100,
-                            'message': '处理完成!',
-                            'status': 'completed',
-                            'download_ready': True,
-                            'record_id': record_id,
-                            'filename': download_filename,
-                            'subtitle_file': subtitle_file,
-                            'duration': result_data.get('duration'),
-                            'quality_info': result_data.get('quality_info', ''),
-                            'model_used': result_data.get('model_used', ''),
-                        }
-                        
-                        yield f"data: {json.dumps(completion_data)}\n\n"
-                        yield f"data: [DONE]\n\n"
-                    else:
-                        yield f"data: {json.dumps({'error': '未找到字幕文件', 'status': 'error'})}\n\n"
-                else:
-                    yield f"data: {json.dumps({'error': '处理失败', 'status': 'error'})}\n\n"
-                    
         except Exception as e:
             logger.error(f"SSE流处理失败: {e}")
-            yield f"data: {json.dumps({'error': f'流处理失败: {str(e)}', 'status': 'error'})}\n\n"
+            yield _sse_event({'error': f'流处理失败: {str(e)}', 'status': 'error'})
+        finally:
+            # 客户端断开时StreamingResponse会取消本生成器，同时取消仍在运行的处理任务，
+            # 避免无人接收结果的whisper/翻译继续占用资源
+            if task is not None and not state.finished:
+                task_manager.cancel_task(task_id)
+                logger.info(f"客户端已断开，取消字幕处理任务: {task_id}")
+            task_manager.cleanup_task(task_id)
 
+    # CORS头由CORSMiddleware统一添加；X-Accel-Buffering关闭nginx缓冲，保证进度实时到达
     return StreamingResponse(
         progress_stream(),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "*",
+            "X-Accel-Buffering": "no",
         }
     )
 
 @router.post("/burn")
-async def burn_subtitles_to_video(request: dict):
+async def burn_subtitles_to_video(request: BurnRequest):
     """将字幕烧录到视频文件中"""
     try:
-        video_file_path = request.get('video_file_path')
-        subtitle_file_path = request.get('subtitle_file_path')
-        output_filename = request.get('output_filename', 'output_with_subtitles.mp4')
+        video_file_path = request.video_file_path
+        subtitle_file_path = request.subtitle_file_path
+        output_filename = request.output_filename
         
-        if not video_file_path:
-            raise HTTPException(status_code=400, detail="缺少video_file_path参数")
-        if not subtitle_file_path:
-            raise HTTPException(status_code=400, detail="缺少subtitle_file_path参数")
-        
-        if not os.path.exists(video_file_path):
+        if not await _aexists(video_file_path):
             raise HTTPException(status_code=404, detail="视频文件不存在")
-        if not os.path.exists(subtitle_file_path):
+        if not await _aexists(subtitle_file_path):
             raise HTTPException(status_code=404, detail="字幕文件不存在")
         
-        # 生成输出文件路径
-        output_path = os.path.join(settings.FILES_PATH, output_filename)
-        
-        # 确保输出文件名唯一
+        # 以O_EXCL原子创建占位文件确保输出文件名唯一，同名时追加随机后缀（ffmpeg使用-y覆盖占位文件）
         base_name, ext = os.path.splitext(output_filename)
-        counter = 1
-        while os.path.exists(output_path):
-            new_filename = f"{base_name}_{counter}{ext}"
-            output_path = os.path.join(settings.FILES_PATH, new_filename)
-            counter += 1
-            if counter > 100:  # 防止无限循环
-                raise HTTPException(status_code=500, detail="无法生成唯一的输出文件名")
+        output_path = None
+        for attempt in range(3):
+            candidate = f"{base_name}_{uuid.uuid4().hex[:8]}{ext}" if attempt else output_filename
+            candidate_path = os.path.join(settings.FILES_PATH, candidate)
+            try:
+                os.close(os.open(candidate_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+            except FileExistsError:
+                continue
+            output_path = candidate_path
+            break
+        if output_path is None:
+            raise HTTPException(status_code=500, detail="无法生成唯一的输出文件名")
         
         final_filename = os.path.basename(output_path)
         
@@ -348,36 +454,28 @@ async def burn_subtitles_to_video(request: dict):
         processor = get_subtitle_processor_instance()
         
         # 执行烧录
-        result = await processor.burn_subtitles_to_video(
-            video_file_path, 
-            subtitle_file_path, 
-            output_path
-        )
+        result = None
+        try:
+            result = await processor.burn_subtitles_to_video(
+                video_file_path, 
+                subtitle_file_path, 
+                output_path
+            )
+        finally:
+            # 烧录失败时删除占位文件
+            if not (result and result.get('success')):
+                try:
+                    os.remove(output_path)
+                except FileNotFoundError:
+                    pass
         
         if result.get('success'):
-            # 编码文件名用于下载
-            def encode_video_filename_for_download(filename):
-                """对文件名进行编码以支持中文下载"""
-                import urllib.parse
-                return urllib.parse.quote(filename.encode('utf-8'))
+            # 编码文件名用于下载（支持中文）
+            encoded_filename = urllib.parse.quote(final_filename.encode('utf-8'))
             
-            encoded_filename = encode_video_filename_for_download(final_filename)
-            
-            # 流式返回视频文件
-            async def video_stream_generator():
-                try:
-                    with open(output_path, 'rb') as video_file:
-                        while True:
-                            chunk = video_file.read(8192)  # 8KB chunks
-                            if not chunk:
-                                break
-                            yield chunk
-                except Exception as e:
-                    logger.error(f"视频流读取失败: {e}")
-                    raise
-            
-            return StreamingResponse(
-                video_stream_generator(),
+            # FileResponse在线程池中分块读取，不阻塞事件循环，并自动设置Content-Length
+            return FileResponse(
+                output_path,
                 media_type='video/mp4',
                 headers={
                     'Content-Disposition': f'attachment; filename*=UTF-8\'\'{encoded_filename}',
@@ -394,22 +492,18 @@ async def burn_subtitles_to_video(request: dict):
         raise HTTPException(status_code=500, detail=f"字幕烧录失败: {str(e)}")
 
 @router.post("/generate-from-url")
-async def generate_subtitles_from_url(request: dict, db: Session = Depends(get_db)):
+async def generate_subtitles_from_url(request: GenerateFromUrlRequest, db: Session = Depends(get_db)):
     """从URL生成字幕 - 重写版本"""
     try:
-        # 验证必需参数
-        video_url = request.get('video_url')
-        if not video_url:
-            raise HTTPException(status_code=400, detail="缺少video_url参数")
-        
+        video_url = request.video_url
         if not validate_url(video_url):
             raise HTTPException(status_code=400, detail="无效的视频URL")
         
         # 获取处理参数
-        language = request.get('language', 'auto')
-        model_size = request.get('model_size', 'large-v3')  # 默认使用最新模型
-        target_language = request.get('target_language')  # 翻译目标语言
-        quality_mode = request.get('quality_mode', 'balance')  # quality/balance/speed
+        language = request.language
+        model_size = request.model_size  # 默认使用最新模型
+        target_language = request.target_language  # 翻译目标语言
+        quality_mode = request.quality_mode  # quality/balance/speed
         
         # 生成任务ID
         task_id = str(uuid.uuid4())
@@ -468,26 +562,23 @@ async def generate_subtitles_from_url(request: dict, db: Session = Depends(get_d
         raise HTTPException(status_code=500, detail=f"生成字幕失败: {str(e)}")
 
 @router.post("/generate-from-file") 
-async def generate_subtitles_from_file(request: dict, db: Session = Depends(get_db)):
+async def generate_subtitles_from_file(request: GenerateFromFileRequest, db: Session = Depends(get_db)):
     """从文件生成字幕 - 重写版本"""
     try:
-        # 验证必需参数
-        video_file_path = request.get('video_file_path')
-        if not video_file_path:
-            raise HTTPException(status_code=400, detail="缺少video_file_path参数")
+        video_file_path = request.video_file_path
         
         # 构建完整文件路径
         if not os.path.isabs(video_file_path):
             video_file_path = os.path.join(settings.FILES_PATH, video_file_path)
         
-        if not os.path.exists(video_file_path):
+        if not await _aexists(video_file_path):
             raise HTTPException(status_code=404, detail="视频文件不存在")
         
         # 获取处理参数
-        language = request.get('language', 'auto')
-        model_size = request.get('model_size', 'large-v3')  # 默认使用最新模型
-        target_language = request.get('target_language')  # 翻译目标语言
-        quality_mode = request.get('quality_mode', 'balance')  # quality/balance/speed
+        language = request.language
+        model_size = request.model_size  # 默认使用最新模型
+        target_language = request.target_language  # 翻译目标语言
+        quality_mode = request.quality_mode  # quality/balance/speed
         
         # 生成任务ID
         task_id = str(uuid.uuid4())
@@ -546,30 +637,23 @@ async def generate_subtitles_from_file(request: dict, db: Session = Depends(get_
         raise HTTPException(status_code=500, detail=f"生成字幕失败: {str(e)}")
 
 @router.post("/translate-subtitle")
-async def translate_subtitle(request: dict, db: Session = Depends(get_db)):
+async def translate_subtitle(request: TranslateRequest, db: Session = Depends(get_db)):
     """翻译字幕文件 - 重写版本"""
     try:
-        # 验证必需参数
-        subtitle_file_path = request.get('subtitle_file_path')
-        target_language = request.get('target_language')
-        
-        if not subtitle_file_path:
-            raise HTTPException(status_code=400, detail="缺少subtitle_file_path参数")
-        
-        if not target_language:
-            raise HTTPException(status_code=400, detail="缺少target_language参数")
+        subtitle_file_path = request.subtitle_file_path
+        target_language = request.target_language
         
         # 构建完整文件路径
         if not os.path.isabs(subtitle_file_path):
             subtitle_file_path = os.path.join(settings.FILES_PATH, subtitle_file_path)
         
-        if not os.path.exists(subtitle_file_path):
+        if not await _aexists(subtitle_file_path):
             raise HTTPException(status_code=404, detail="字幕文件不存在")
         
         # 获取处理参数
-        source_language = request.get('source_language', 'auto')
-        translation_method = request.get('translation_method', 'optimized')  # optimized/enhanced/basic
-        quality_mode = request.get('quality_mode', 'balance')  # quality/balance/speed
+        source_language = request.source_language
+        translation_method = request.translation_method  # optimized/enhanced/basic
+        quality_mode = request.quality_mode  # quality/balance/speed
         
         # 生成任务ID
         task_id = str(uuid.uuid4())
@@ -713,7 +797,7 @@ async def validate_subtitle_request(request: dict):
                     "error": "无效的视频URL"
                 }
             
-            if video_file_path and not os.path.exists(
+            if video_file_path and not await _aexists(
                 os.path.join(settings.FILES_PATH, video_file_path) 
                 if not os.path.isabs(video_file_path) else video_file_path
             ):
@@ -744,7 +828,7 @@ async def validate_subtitle_request(request: dict):
                 if not os.path.isabs(subtitle_file_path)
                 else subtitle_file_path
             )
-            if not os.path.exists(full_path):
+            if not await _aexists(full_path):
                 return {
                     "valid": False,
                     "error": "字幕文件不存在"
@@ -778,7 +862,6 @@ async def cancel_task(request: dict):
         
         # 首先尝试后台任务管理器
         try:
-            from ....core.task_manager import get_task_manager
             task_manager_bg = get_task_manager()
             result = await task_manager_bg.cancel_task(task_id)
             
@@ -892,7 +975,7 @@ async def test_optimized_translator(request: dict):
         # 构建完整路径
         full_subtitle_path = os.path.join(str(settings.FILES_PATH), subtitle_file_path)
         
-        if not os.path.exists(full_subtitle_path):
+        if not await _aexists(full_subtitle_path):
             raise HTTPException(status_code=404, detail=f"字幕文件不存在: {subtitle_file_path}")
         
         # 获取处理器实例
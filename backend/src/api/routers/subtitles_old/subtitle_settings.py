@@ -3,55 +3,58 @@
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import Optional, Dict, Any
+import functools
 import logging
 import time
 import os
 
+try:
+    import torch
+except ImportError:  # torch为可选依赖，未安装时按无CUDA处理
+    torch = None
+
 from ....core.config import settings, TRANSLATION_METHODS
 from ....core.subtitle_processor import get_subtitle_processor_instance
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# 支持的语言列表
-SUBTITLE_LANGUAGES = {
-    "auto": "自动检测",
-    "zh": "中文",
-    "en": "英语",
-    "ja": "日语",
-    "ko": "韩语",
-    "fr": "法语",
-    "de": "德语",
-    "es": "西班牙语",
-    "ru": "俄语"
-}
-
-@router.get("/languages")
-async def get_supported_languages():
-    """获取支持的字幕语言列表"""
-    return {
-        "languages": SUBTITLE_LANGUAGES,
-        "default": "auto"
-    }
+@functools.lru_cache(maxsize=1)
+def _get_cuda_info() -> Dict[str, Any]:
+    """检测CUDA设备信息（进程内只检测一次，get_device_properties开销较大）"""
+    cuda_info = {"cuda_available": False, "gpu_memory_gb": 0}
+    if torch is None:
+        return cuda_info
+    
+    try:
+        if torch.cuda.is_available():
+            cuda_info["cuda_available"] = True
+            cuda_info["device_count"] = torch.cuda.device_count()
+            if cuda_info["device_count"] > 0:
+                properties = torch.cuda.get_device_properties(0)
+                cuda_info["gpu_memory_gb"] = properties.total_memory / (1024**3)
+                cuda_info["gpu_name"] = properties.name
+    except Exception as e:
+        logger.warning(f"检测CUDA设备失败: {e}")
+    return cuda_info
 
-@router.get("/models")
-async def get_available_models():
-    """获取可用的AI模型"""
-    return {
-        "models": {
-            "tiny": "最快，准确度最低 (50MB)",
-            "base": "平衡选择 (150MB)", 
-            "small": "较好准确度 (250MB)",
-            "medium": "高准确度 (800MB)",
-            "large": "最高准确度 (1.5GB)"
-        },
-        "default": "base"
-    }
+# 设置保存时的合法取值
+VALID_MODEL_SIZES = frozenset({
+    "tiny", "tiny.en", "base", "base.en", "small", "small.en",
+    "medium", "medium.en", "large", "large-v1", "large-v2", "large-v3"
+})
+VALID_DEVICES = frozenset({'cpu', 'cuda', 'auto'})
+VALID_COMPUTE_TYPES = frozenset({'int8', 'int16', 'float16', 'float32'})
+VALID_SOURCE_LANGUAGES = frozenset({'auto', 'en', 'zh', 'ja', 'ko', 'fr', 'de', 'es', 'ru', 'it', 'pt', 'nl', 'ar'})
+VALID_TARGET_LANGUAGES = frozenset({
+    'zh-cn', 'zh-tw', 'en', 'ja', 'ko', 'fr', 'de', 'es', 'ru',
+    'it', 'pt', 'nl', 'ar', 'hi', 'th', 'vi', 'tr', 'pl', 'sv', 'da'
+})
 
-@router.get("/translation-methods")
-async def get_translation_methods():
-    """获取可用的翻译方法"""
+def _build_translation_methods_response() -> Dict[str, Any]:
+    """根据当前配置生成翻译方法列表响应"""
     # 构建翻译方法列表，只返回SentencePiece
     methods = []
     for code in settings.AVAILABLE_TRANSLATION_METHODS:
@@ -82,36 +85,30 @@ async def get_translation_methods():
         "fallback_enabled": settings.SUBTITLE_FALLBACK_ENABLED
     }
 
-@router.get("/ai-settings")
+# 翻译方法响应只在保存翻译设置后变化，导入时生成，保存设置时刷新
+_translation_methods_response = _build_translation_methods_response()
+
+@router.get("/translation-methods", response_class=ORJSONResponse)
+async def get_translation_methods():
+    """获取可用的翻译方法"""
+    return _translation_methods_response
+
+@router.get("/ai-settings", response_class=ORJSONResponse)
 async def get_ai_settings():
     """获取AI配置和模型信息"""
     try:
-        from ....core.subtitle_processor import SubtitleProcessor
-        
-        # 创建处理器实例以获取实时信息
-        processor = SubtitleProcessor()
+        # 复用全局处理器实例，模型信息按当前缓存状态实时生成
+        processor = get_subtitle_processor_instance()
         model_info = processor.get_model_info()
         
         # 设备信息检测
         device_info = {
             "current_device": model_info["device"],
             "auto_selection": model_info["auto_device_selection"],
-            "cuda_available": False,
-            "gpu_memory_gb": 0,
+            **_get_cuda_info(),
             "cpu_cores": os.cpu_count() or 1
         }
         
-        # 检测CUDA
-        try:
-            import torch
-            if torch.cuda.is_available():
-                device_info["cuda_available"] = True
-                if torch.cuda.device_count() > 0:
-                    device_info["gpu_memory_gb"] = torch.cuda.get_device_properties(0).total_memory / (1024**3)
-                    device_info["gpu_name"] = torch.cuda.get_device_properties(0).name
-        except ImportError:
-            pass
-        
         # Whisper配置
         whisper_config = {
             "model_size": settings.WHISPER_MODEL_SIZE,
@@ -193,22 +190,19 @@ async def save_ai_settings(request: dict):
             raise HTTPException(status_code=400, detail="模型大小参数必需")
         
         # 验证模型大小是否有效
-        valid_models = ["tiny", "tiny.en", "base", "base.en", "small", "small.en", 
-                       "medium", "medium.en", "large", "large-v1", "large-v2", "large-v3"]
-        if model_size not in valid_models:
+        if model_size not in VALID_MODEL_SIZES:
             raise HTTPException(status_code=400, detail=f"无效的模型大小: {model_size}")
         
         # 验证设备类型
-        if device and device not in ['cpu', 'cuda', 'auto']:
+        if device and device not in VALID_DEVICES:
             raise HTTPException(status_code=400, detail=f"无效的设备类型: {device}")
             
         # 验证计算类型
-        if compute_type and compute_type not in ['int8', 'int16', 'float16', 'float32']:
+        if compute_type and compute_type not in VALID_COMPUTE_TYPES:
             raise HTTPException(status_code=400, detail=f"无效的计算类型: {compute_type}")
         
         # 验证源语言
-        valid_languages = ['auto', 'en', 'zh', 'ja', 'ko', 'fr', 'de', 'es', 'ru', 'it', 'pt', 'nl', 'ar']
-        if source_language and source_language not in valid_languages:
+        if source_language and source_language not in VALID_SOURCE_LANGUAGES:
             raise HTTPException(status_code=400, detail=f"无效的源语言: {source_language}")
         
         # 更新配置
@@ -219,9 +213,10 @@ async def save_ai_settings(request: dict):
             updated_settings['whisper_model_size'] = model_size
         
         if device:
+            # 硬件信息不随设置变化，直接使用缓存的检测结果
             if device == 'auto':
                 settings.AI_AUTO_DEVICE_SELECTION = True
-                settings.WHISPER_DEVICE = 'cuda' if hasattr(settings, 'cuda_available') and settings.cuda_available else 'cpu'
+                settings.WHISPER_DEVICE = 'cuda' if _get_cuda_info()["cuda_available"] else 'cpu'
             else:
                 settings.AI_AUTO_DEVICE_SELECTION = False
                 settings.WHISPER_DEVICE = device
@@ -259,7 +254,7 @@ async def save_ai_settings(request: dict):
         logger.error(f"保存字幕生成设置失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"保存字幕生成设置失败: {str(e)}")
 
-@router.get("/translation-settings")
+@router.get("/translation-settings", response_class=ORJSONResponse)
 async def get_translation_settings():
     """获取翻译设置"""
     try:
@@ -310,11 +305,7 @@ async def save_translation_settings(request: dict):
                 raise HTTPException(status_code=400, detail="重试次数必须是0-5之间的整数")
         
         # 验证目标语言
-        valid_target_languages = [
-            'zh-cn', 'zh-tw', 'en', 'ja', 'ko', 'fr', 'de', 'es', 'ru', 
-            'it', 'pt', 'nl', 'ar', 'hi', 'th', 'vi', 'tr', 'pl', 'sv', 'da'
-        ]
-        if target_language and target_language not in valid_target_languages:
+        if target_language and target_language not in VALID_TARGET_LANGUAGES:
             raise HTTPException(status_code=400, detail=f"无效的目标语言: {target_language}")
         
         # 更新配置
@@ -342,6 +333,10 @@ async def save_translation_settings(request: dict):
         
         logger.info(f"字幕翻译设置已更新: {updated_settings}")
         
+        # 刷新翻译方法响应缓存
+        global _translation_methods_response
+        _translation_methods_response = _build_translation_methods_response()
+        
         return {
             "success": True,
             "message": "字幕翻译设置保存成功",
@@ -377,15 +372,12 @@ async def test_translation_service(request: dict):
         
         # 测试本地翻译（SentencePiece）
         if method == 'sentencepiece':
-            from ....core.subtitle_processor import SubtitleProcessor
-            processor = SubtitleProcessor()
+            # 复用全局处理器的翻译器，离线翻译模型只在首次创建时初始化
+            processor = get_subtitle_processor_instance()
             
             start_time = time.time()
             try:
-                if not processor.translator.load_model(target_language):
-                    raise Exception("翻译器初始化失败")
-                
-                result_text = processor.translator.translate_text(text, target_language)
+                result_text = await processor.translator.translate_text(text, target_language)
                 execution_time = time.time() - start_time
                 
                 return {
@@ -59,8 +59,7 @@ async def cancel_task(request: dict):
 async def get_task_status(task_id: str):
     """获取任务状态"""
     try:
-        with task_manager.lock:
-            task_info = task_manager.active_tasks.get(task_id)
+        task_info = task_manager.active_tasks.get(task_id)
         
         if task_info:
             return {
@@ -4,48 +4,70 @@
 包含任务管理、文件名处理等通用功能
 """
 
-import threading
+import functools
+import logging
 import time
 import re
 import os
-from pathlib import Path
+import urllib.parse
 from typing import Optional
 
+from ....utils.filename_utils import UUID_STEM_PATTERN, load_mapping_info_sync
+
+logger = logging.getLogger(__name__)
+
+# 文件系统禁用字符，str.translate一次删除
+INVALID_FILENAME_TABLE = str.maketrans('', '', '<>:"/\\|?*')
+WHITESPACE_RUN = re.compile(r'\s+')
+# 文件名最大UTF-8字节数
+MAX_FILENAME_BYTES = 200
+
+# 下载文件名的ASCII回退名：非ASCII单词字符替换为下划线，连续下划线合并
+NON_ASCII_FILENAME_CHARS = re.compile(r'[^\w\.-]', re.ASCII)
+UNDERSCORE_RUN = re.compile(r'_+')
+
+# 查找相关视频标题时识别的视频扩展名
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm'})
+
+# 简单的URL格式（模块加载时编译一次）
+URL_PATTERN = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
 
 class TaskManager:
-    """任务管理器，用于跟踪和管理正在进行的任务"""
+    """任务管理器，用于跟踪和管理正在进行的任务
+    
+    非线程安全：只能在事件循环中调用。状态查询（is_cancelled、get_active_tasks、
+    active_tasks.get）都是单次字典操作，不加锁；高频轮询任务状态时没有锁竞争
+    """
     
     def __init__(self):
         self.active_tasks = {}
-        self.lock = threading.Lock()
     
     def start_task(self, task_id: str, thread_obj=None):
         """启动任务"""
-        with self.lock:
-            self.active_tasks[task_id] = {
-                "status": "running",
-                "start_time": time.time(),
-                "thread": thread_obj
-            }
+        self.active_tasks[task_id] = {
+            "status": "running",
+            "start_time": time.time(),
+            "thread": thread_obj
+        }
     
     def cancel_task(self, task_id: str):
         """取消任务"""
-        with self.lock:
-            if task_id in self.active_tasks:
-                del self.active_tasks[task_id]
-                return True
-            return False
+        return self.active_tasks.pop(task_id, None) is not None
     
     def complete_task(self, task_id: str):
         """完成任务"""
-        with self.lock:
-            if task_id in self.active_tasks:
-                del self.active_tasks[task_id]
+        self.active_tasks.pop(task_id, None)
     
     def is_cancelled(self, task_id: str):
         """检查任务是否被取消"""
-        with self.lock:
-            return task_id not in self.active_tasks
+        return task_id not in self.active_tasks
     
     def cleanup_task(self, task_id: str):
         """清理任务"""
@@ -53,8 +75,7 @@ class TaskManager:
     
     def get_active_tasks(self):
         """获取活动任务列表"""
-        with self.lock:
-            return list(self.active_tasks.keys())
+        return list(self.active_tasks)
 
 
 # 全局任务管理器实例
@@ -66,51 +87,51 @@ def validate_url(url: str) -> bool:
     if not url:
         return False
     
-    # 简单的URL验证
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    
-    return url_pattern.match(url) is not None
+    return URL_PATTERN.match(url) is not None
+
+
+@functools.lru_cache(maxsize=256)
+def _list_video_files(directory: str, mtime_ns: int) -> tuple:
+    """列出目录中的视频文件 (文件名, 不含扩展名的文件名)，按(目录, 修改时间)缓存"""
+    video_files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() in VIDEO_EXTENSIONS and entry.is_file():
+                video_files.append((entry.name, stem))
+    return tuple(video_files)
 
 
 def get_original_title_from_path(file_path: str) -> str:
     """从文件路径获取原始标题"""
     try:
-        file_name = Path(file_path).name
+        file_name = os.path.basename(file_path)
         
         # 检查是否是UUID格式的文件名
-        if len(file_name.split('.')[0]) == 36 and '-' in file_name:
+        uuid_match = UUID_STEM_PATTERN.match(file_name)
+        if uuid_match:
+            uuid_part = uuid_match.group(0)
             # 这是一个UUID文件名，尝试查找相关的原始文件名
-            directory = Path(file_path).parent
-            uuid_part = file_name.split('.')[0]
+            directory = os.path.dirname(file_path)
             
-            # 查找映射文件
-            mapping_file = directory / f"{uuid_part}_mapping.json"
-            if mapping_file.exists():
-                try:
-                    import json
-                    with open(mapping_file, 'r', encoding='utf-8') as f:
-                        mapping = json.load(f)
-                        return mapping.get('original_filename', file_name)
-                except Exception:
-                    pass
+            # 查找映射文件（解析结果按mtime缓存）
+            mapping_file = os.path.join(directory, f"{uuid_part}_mapping.json")
+            try:
+                mapping = load_mapping_info_sync(mapping_file)
+                if mapping is not None:
+                    return mapping.get('original_filename', file_name)
+            except Exception:
+                pass
             
             # 如果没有映射文件，尝试在同目录中查找相关的视频文件
-            related_title = find_related_video_title(str(directory), uuid_part)
+            related_title = find_related_video_title(directory or '.', uuid_part)
             if related_title:
                 return related_title
         
         # 移除文件扩展名并返回
-        return Path(file_name).stem
+        return os.path.splitext(file_name)[0]
         
     except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
         logger.warning(f"无法从路径提取标题: {e}")
         return "未知标题"
 
@@ -118,67 +139,52 @@ def get_original_title_from_path(file_path: str) -> str:
 def find_related_video_title(directory: str, exclude_uuid: str) -> str:
     """在指定目录中查找相关的视频文件标题"""
     try:
-        from ....core.config import settings
-        
-        video_extensions = ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm']
-        
-        for file_path in Path(directory).iterdir():
-            if file_path.is_file():
-                # 跳过UUID文件
-                if exclude_uuid in file_path.name:
-                    continue
-                
-                # 检查是否是视频文件
-                if file_path.suffix.lower() in video_extensions:
-                    return file_path.stem
+        # 目录未变化时复用上次的扫描结果
+        for name, stem in _list_video_files(directory, os.stat(directory).st_mtime_ns):
+            # 跳过UUID文件
+            if exclude_uuid not in name:
+                return stem
         
         return None
         
     except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
         logger.warning(f"查找相关视频标题失败: {e}")
         return None
 
 
 def sanitize_filename(filename: str) -> str:
     """清理文件名，移除不安全字符"""
-    safe_chars = re.sub(r'[<>:"/\\|?*]', '', filename)
-    safe_chars = re.sub(r'\s+', ' ', safe_chars).strip()
+    safe_chars = filename.translate(INVALID_FILENAME_TABLE)
+    safe_chars = WHITESPACE_RUN.sub(' ', safe_chars).strip()
     
     if not safe_chars:
         return "subtitle"
     
-    # 限制文件名长度
-    if len(safe_chars.encode('utf-8')) > 200:
-        result_name = ""
-        for char in safe_chars:
-            test_result = result_name + char
-            if len(test_result.encode('utf-8')) > 200:
-                break
-            result_name = test_result
-        safe_chars = result_name.strip()
+    # 按UTF-8字节长度截断，errors='ignore' 丢弃被截断的半个多字节字符
+    encoded = safe_chars.encode('utf-8')
+    if len(encoded) > MAX_FILENAME_BYTES:
+        safe_chars = encoded[:MAX_FILENAME_BYTES].decode('utf-8', 'ignore').strip()
         if not safe_chars:
             return "subtitle"
     
     return safe_chars
 
 
+@functools.lru_cache(maxsize=1024)
 def encode_filename_for_download(filename: str) -> str:
-    """为下载编码文件名"""
-    try:
-        filename.encode('ascii')
+    """为下载编码文件名（结果按文件名缓存，重复下载时不再重新编码）"""
+    # 控制字符、引号和反斜杠不能直接放入filename参数，交给下面的编码分支处理
+    if filename.isascii() and filename.isprintable() and '"' not in filename and '\\' not in filename:
         return f'attachment; filename="{filename}"'
-    except UnicodeEncodeError:
-        try:
-            import urllib.parse
-            encoded_filename = urllib.parse.quote(filename, safe='')
-            ascii_safe = re.sub(r'[^\w\.-]', '_', filename, flags=re.ASCII)
-            ascii_safe = re.sub(r'_+', '_', ascii_safe).strip('_')
-            
-            if not ascii_safe.endswith('.srt'):
-                ascii_safe = ascii_safe.rstrip('.') + '.srt'
-            
-            return f'attachment; filename="{ascii_safe}"; filename*=UTF-8\'\'{encoded_filename}'
-        except Exception:
-            return f'attachment; filename="subtitle_download.srt"' 
\ No newline at end of file
+    
+    try:
+        encoded_filename = urllib.parse.quote(filename, safe='')
+        ascii_safe = NON_ASCII_FILENAME_CHARS.sub('_', filename)
+        ascii_safe = UNDERSCORE_RUN.sub('_', ascii_safe).strip('_')
+        
+        if not ascii_safe.endswith('.srt'):
+            ascii_safe = ascii_safe.rstrip('.') + '.srt'
+        
+        return f'attachment; filename="{ascii_safe}"; filename*=UTF-8\'\'{encoded_filename}'
+    except Exception:
+        return f'attachment; filename="subtitle_download.srt"' 
\ No newline at end of file
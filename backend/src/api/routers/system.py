@@ -295,7 +295,7 @@ async def get_system_info():
         raise HTTPException(status_code=500, detail="获取系统信息失败")
 
 @router.get("/stats", response_model=TaskStats)
-async def get_task_stats(db = Depends(get_db)):
+def get_task_stats(db = Depends(get_db)):
     """获取任务统计信息"""
     try:
         # 下载任务统计
@@ -457,7 +457,7 @@ async def get_system_config():
         raise HTTPException(status_code=500, detail="获取系统配置失败")
 
 @router.post("/cleanup")
-async def cleanup_system(
+def cleanup_system(
     cleanup_downloads: bool = False,
     cleanup_logs: bool = False,
     cleanup_temp: bool = True,
@@ -0,0 +1,131 @@
+"""
+AVD Web版本 - 响应缓存模块
+
+基于Redis的JSON缓存，Redis不可用时自动回退到进程内缓存
+"""
+
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+from .config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis为可选依赖
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# 进程内缓存最大条目数，超过时清理过期条目
+LOCAL_CACHE_MAX_ITEMS = 1024
+
+
+def _dumps(value: Any) -> bytes:
+    """序列化缓存值，Redis和进程内缓存共用，两种后端读回的值一致
+
+    非字符串的字典键与标准库json一样转为字符串
+    """
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def make_cache_key(prefix: str, *parts: str) -> str:
+    """生成缓存键
+
+    Args:
+        prefix: 缓存键前缀
+        parts: 参与哈希的内容（如URL）
+
+    Returns:
+        缓存键
+    """
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+    return f"avd:{prefix}:{digest}"
+
+
+class ResponseCache:
+    """响应缓存"""
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self._redis = None
+        # 进程内缓存保存序列化后的字节，每次读取都得到新的对象，调用方修改结果不会污染缓存
+        self._local: Dict[str, Tuple[float, bytes]] = {}
+
+    async def init(self):
+        """连接Redis，失败时使用进程内缓存"""
+        if aioredis is None:
+            logger.info("未安装redis，使用进程内缓存")
+            return
+
+        try:
+            client = aioredis.from_url(self.redis_url, socket_connect_timeout=2)
+            await client.ping()
+            self._redis = client
+            logger.info("Redis缓存已连接")
+        except Exception as e:
+            logger.warning(f"Redis不可用，使用进程内缓存: {e}")
+            self._redis = None
+
+    async def close(self):
+        """关闭Redis连接"""
+        if self._redis is not None:
+            try:
+                await self._redis.close()
+            except Exception as e:
+                logger.warning(f"关闭Redis连接失败: {e}")
+            self._redis = None
+        self._local.clear()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """读取缓存，未命中或已过期返回None"""
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(key)
+                return orjson.loads(raw) if raw is not None else None
+            except Exception as e:
+                logger.warning(f"读取Redis缓存失败: {e}")
+
+        item = self._local.get(key)
+        if item is None:
+            return None
+
+        expires_at, raw = item
+        if expires_at < time.monotonic():
+            self._local.pop(key, None)
+            return None
+        return orjson.loads(raw)
+
+    async def set(self, key: str, value: Any, expire: int):
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的值
+            expire: 过期时间（秒）
+        """
+        if self._redis is not None:
+            try:
+                await self._redis.set(key, _dumps(value), ex=expire)
+                return
+            except Exception as e:
+                logger.warning(f"写入Redis缓存失败: {e}")
+
+        if len(self._local) >= LOCAL_CACHE_MAX_ITEMS:
+            self._evict_local()
+        self._local[key] = (time.monotonic() + expire, _dumps(value))
+
+    def _evict_local(self):
+        """清理进程内缓存的过期条目，仍超限时清空"""
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._local.items() if expires_at < now]:
+            del self._local[key]
+        if len(self._local) >= LOCAL_CACHE_MAX_ITEMS:
+            self._local.clear()
+
+
+# 全局缓存实例
+response_cache = ResponseCache(settings.REDIS_URL)
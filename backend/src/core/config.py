@@ -21,6 +21,7 @@ class Settings(BaseSettings):
     # 服务器配置
     HOST: str = Field(default="0.0.0.0", env="HOST")
     PORT: int = Field(default=8000, env="PORT")
+    THREADPOOL_SIZE: int = Field(default=100, env="THREADPOOL_SIZE")  # 同步接口（数据库等阻塞操作）使用的线程池大小
     
     # 安全配置
     SECRET_KEY: str = Field(default="your-secret-key-here", env="SECRET_KEY")
@@ -33,6 +34,10 @@ class Settings(BaseSettings):
     # Redis配置（用于任务队列）
     REDIS_URL: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
     
+    # 缓存配置
+    VIDEO_INFO_CACHE_TTL: int = Field(default=60, env="VIDEO_INFO_CACHE_TTL")  # 视频信息缓存时间（秒）
+    VIDEO_INFO_STALE_TTL: int = Field(default=86400, env="VIDEO_INFO_STALE_TTL")  # 下载器失败时可返回的过期数据保留时间（秒）
+    
     # 文件路径配置
     BASE_DIR: Path = Path(__file__).parent.parent.parent
     DATA_DIR: Path = BASE_DIR / "data"
@@ -43,6 +48,10 @@ class Settings(BaseSettings):
     MODELS_PATH: str = str(DATA_DIR / "models")
     LOGS_PATH: str = str(BASE_DIR.parent / "logs")  # 指向项目根目录的logs文件夹
     
+    # 部署在nginx之后时，字幕下载接口由nginx通过X-Accel-Redirect直接发送文件（内部location映射到FILES_PATH，见frontend/nginx.conf）
+    USE_X_ACCEL: bool = Field(default=False, env="USE_X_ACCEL")
+    X_ACCEL_PREFIX: str = Field(default="/_protected/", env="X_ACCEL_PREFIX")
+    
     # 下载配置
     MAX_CONCURRENT_DOWNLOADS: int = Field(default=3, env="MAX_CONCURRENT_DOWNLOADS")
     MAX_FILE_SIZE_MB: int = Field(default=1024, env="MAX_FILE_SIZE_MB")  # 1GB
@@ -106,6 +115,7 @@ class Settings(BaseSettings):
     SUBTITLE_TRANSLATION_MAX_RETRIES: int = Field(default=3, env="SUBTITLE_TRANSLATION_MAX_RETRIES")  # 最大重试次数增加到3次
     SUBTITLE_FALLBACK_ENABLED: bool = Field(default=True, env="SUBTITLE_FALLBACK_ENABLED")  # 启用回退翻译
     SUBTITLE_DEFAULT_TARGET_LANGUAGE: str = Field(default="zh-cn", env="SUBTITLE_DEFAULT_TARGET_LANGUAGE")  # 默认目标语言
+    SUBTITLE_MAX_CONCURRENT_TASKS: int = Field(default=2, env="SUBTITLE_MAX_CONCURRENT_TASKS")  # 同时运行的字幕处理任务数，其余排队
     
     # 可用的翻译方法
     AVAILABLE_TRANSLATION_METHODS: List[str] = Field(default=[
@@ -4,7 +4,7 @@ AVD Web版本 - 数据库管理模块
 提供数据库连接、会话管理和初始化功能
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
@@ -15,7 +15,7 @@ from contextlib import contextmanager
 from typing import Generator
 
 from .config import settings
-from ..models.downloads import Base, SystemSettings
+from ..models.downloads import Base, SystemSettings, DownloadTask
 from ..models import subtitles  # 确保导入字幕模型
 
 logger = logging.getLogger(__name__)
@@ -26,18 +26,34 @@ engine_kwargs = {
 }
 
 # SQLite特殊配置
-if settings.DATABASE_URL.startswith("sqlite"):
-    engine_kwargs.update({
-        "poolclass": StaticPool,
-        "connect_args": {
-            "check_same_thread": False,  # 允许多线程访问
-            "timeout": 20,  # 连接超时
-        }
-    })
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (
+    ":memory:" in settings.DATABASE_URL or settings.DATABASE_URL in ("sqlite://", "sqlite:///")
+)
+
+if IS_SQLITE:
+    engine_kwargs["connect_args"] = {
+        "check_same_thread": False,  # 会话可能在线程池和事件循环之间交替使用
+        "timeout": 20,  # 等待写锁的超时时间
+    }
+    if IS_SQLITE_MEMORY:
+        # 内存数据库只能共享同一个连接
+        engine_kwargs["poolclass"] = StaticPool
+    # 文件数据库使用默认连接池：每个会话独占一个连接，
+    # 线程池中并发执行的请求不会共用连接、互相提交或回滚对方的事务
 
 # 创建数据库引擎
 engine = create_engine(settings.DATABASE_URL, **engine_kwargs)
 
+if IS_SQLITE and not IS_SQLITE_MEMORY:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        """WAL模式下读操作不阻塞写操作，多个连接并发访问时减少锁等待"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -52,6 +68,10 @@ async def init_db():
         # 创建所有表
         Base.metadata.create_all(bind=engine)
         
+        # create_all不会给已存在的表补建索引，这里单独检查创建
+        for index in DownloadTask.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+        
         # 插入默认设置
         await insert_default_settings()
         
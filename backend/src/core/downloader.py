@@ -21,7 +21,7 @@ from dataclasses import dataclass
 import aiohttp
 import yt_dlp
 
-from .downloaders.downloader_factory import DownloaderFactory
+from .downloaders.downloader_factory import downloader_factory
 from .downloaders import DownloadOptions
 from ..utils.validators import validate_url
 
@@ -31,7 +31,8 @@ class VideoDownloader:
     """统一视频下载器"""
     
     def __init__(self):
-        self.factory = DownloaderFactory()
+        # 与字幕URL处理共用全局下载器工厂，各平台下载器只创建一份
+        self.factory = downloader_factory
         self.progress_callbacks: Dict[str, Callable] = {}
         self.download_processes: Dict[str, subprocess.Popen] = {}
     
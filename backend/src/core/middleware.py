@@ -0,0 +1,41 @@
+"""
+AVD Web版本 - ASGI中间件
+"""
+
+import logging
+
+from fastapi.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+# multipart表单边界和字段头的额外开销
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class RequestSizeLimitMiddleware:
+    """根据Content-Length提前拒绝超大请求
+    
+    FastAPI在调用接口函数前就会完整解析multipart请求体，接口内的大小检查无法避免接收数据；
+    这里在读取请求体之前返回413。未携带Content-Length的分块上传由上传时的流式计数限制。
+    """
+    
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size + MULTIPART_OVERHEAD_BYTES
+        self.max_size_mb = max_body_size // (1024 * 1024)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_body_size:
+                        logger.warning(f"拒绝超大请求: {scope['path']} ({int(value)} 字节)")
+                        response = ORJSONResponse(
+                            {"detail": f"文件过大，最大支持 {self.max_size_mb}MB"},
+                            status_code=413
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        
+        await self.app(scope, receive, send)
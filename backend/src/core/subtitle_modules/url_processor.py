@@ -6,8 +6,10 @@ URL处理器模块
 
 import os
 import glob
+import re
 import time
-from typing import Dict, Any, Optional, Callable, List
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, List, Tuple
 from pathlib import Path
 
 from ...utils.logger import get_logger
@@ -20,6 +22,58 @@ from .subtitle_translator import SubtitleTranslator
 import asyncio
 import traceback
 
+# 文件名清理（模块加载时编译一次）
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s\-_\.]')
+UNDERSCORE_RUN = re.compile(r'[_\s]+')
+
+# 视频标题缓存：URL -> (标题, 获取时间)，按最近使用淘汰
+VIDEO_TITLE_CACHE_SIZE = 1024
+VIDEO_TITLE_TTL = 86400  # 秒
+_video_titles: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+# 正在后台刷新的标题（持有任务引用，避免被垃圾回收）
+_title_refresh_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _remember_title(url: str, title: str):
+    """记录视频标题，超出容量时淘汰最久未使用的条目"""
+    _video_titles[url] = (title, time.monotonic())
+    _video_titles.move_to_end(url)
+    if len(_video_titles) > VIDEO_TITLE_CACHE_SIZE:
+        _video_titles.popitem(last=False)
+
+
+def _get_cached_title(url: str, downloader) -> Optional[str]:
+    """读取缓存的视频标题，未命中或已过期返回None
+    
+    超过一半有效期时仍立即返回旧标题，同时在后台重新获取
+    """
+    cached = _video_titles.get(url)
+    if cached is None:
+        return None
+    
+    title, fetched_at = cached
+    age = time.monotonic() - fetched_at
+    if age >= VIDEO_TITLE_TTL:
+        del _video_titles[url]
+        return None
+    
+    _video_titles.move_to_end(url)
+    if age >= VIDEO_TITLE_TTL / 2 and url not in _title_refresh_tasks:
+        _title_refresh_tasks[url] = asyncio.create_task(_refresh_title(url, downloader))
+    return title
+
+
+async def _refresh_title(url: str, downloader):
+    """后台重新获取视频标题"""
+    try:
+        video_info = await downloader.get_video_info(url)
+        if video_info:
+            _remember_title(url, video_info.get("title", "unknown_video"))
+    except Exception as e:
+        logger.warning(f"后台刷新视频标题失败: {url} - {e}")
+    finally:
+        _title_refresh_tasks.pop(url, None)
+
 class URLProcessor:
     """URL处理器"""
     
@@ -67,37 +121,42 @@ class URLProcessor:
                     await progress_callback(0, f"错误: {error_msg}")
                 return {"success": False, "error": error_msg}
             
-            # 获取视频信息 - 增加重试机制
-            video_info = None
-            for attempt in range(3):  # 重试3次
-                try:
-                    if progress_callback:
-                        await progress_callback(8 + attempt * 2, f"正在获取视频信息(尝试 {attempt + 1}/3)...")
+            # 标题缓存未过期时不再请求视频信息，超过一半有效期后在后台刷新
+            video_title = _get_cached_title(url, downloader)
+            if video_title is None:
+                # 获取视频信息 - 增加重试机制
+                video_info = None
+                for attempt in range(3):  # 重试3次
+                    try:
+                        if progress_callback:
+                            await progress_callback(8 + attempt * 2, f"正在获取视频信息(尝试 {attempt + 1}/3)...")
                     
-                    video_info = await downloader.get_video_info(url)
-                    if video_info:
-                        break
+                        video_info = await downloader.get_video_info(url)
+                        if video_info:
+                            break
                         
-                except Exception as e:
-                    logger.warning(f"获取视频信息失败(尝试 {attempt + 1}/3): {e}")
-                    if attempt == 2:  # 最后一次尝试
-                        error_msg = f"无法获取视频信息: {str(e)}"
-                        logger.error(f"URLProcessor错误: {error_msg}")
-                        if progress_callback:
-                            await progress_callback(0, f"错误: {error_msg}")
-                        return {"success": False, "error": error_msg}
+                    except Exception as e:
+                        logger.warning(f"获取视频信息失败(尝试 {attempt + 1}/3): {e}")
+                        if attempt == 2:  # 最后一次尝试
+                            error_msg = f"无法获取视频信息: {str(e)}"
+                            logger.error(f"URLProcessor错误: {error_msg}")
+                            if progress_callback:
+                                await progress_callback(0, f"错误: {error_msg}")
+                            return {"success": False, "error": error_msg}
                     
-                    # 等待后重试
-                    await asyncio.sleep(2 ** attempt)  # 指数退避
+                        # 等待后重试
+                        await asyncio.sleep(2 ** attempt)  # 指数退避
             
-            if not video_info:
-                error_msg = "无法获取视频信息"
-                logger.error(f"URLProcessor错误: {error_msg}")
-                if progress_callback:
-                    await progress_callback(0, f"错误: {error_msg}")
-                return {"success": False, "error": error_msg}
+                if not video_info:
+                    error_msg = "无法获取视频信息"
+                    logger.error(f"URLProcessor错误: {error_msg}")
+                    if progress_callback:
+                        await progress_callback(0, f"错误: {error_msg}")
+                    return {"success": False, "error": error_msg}
                 
-            video_title = video_info.get("title", "unknown_video")
+                video_title = video_info.get("title", "unknown_video")
+                _remember_title(url, video_title)
+            
             safe_title = self._sanitize_filename(video_title)
             
             if progress_callback:
@@ -391,7 +450,6 @@ class URLProcessor:
             
         except Exception as e:
             logger.error(f"查找音频文件失败: {e}")
-            import traceback
             logger.error(f"错误堆栈: {traceback.format_exc()}")
             return None
 
@@ -503,7 +561,6 @@ class URLProcessor:
             
         except Exception as e:
             logger.error(f"转换.mhtml文件失败: {e}")
-            import traceback
             logger.error(f"错误堆栈: {traceback.format_exc()}")
             return None
     
@@ -560,29 +617,19 @@ class URLProcessor:
         if not filename:
             return default_name
         
-        import re
-        
-        # 移除或替换非法字符
-        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-        
-        # 移除表情符号和其他Unicode特殊字符
-        filename = re.sub(r'[^\w\s\-_\.]', '_', filename)
+        # 替换非法字符、表情符号和其他Unicode特殊字符（文件系统禁用字符也在其中）
+        filename = UNSAFE_FILENAME_CHARS.sub('_', filename)
         
         # 移除多余的空格、下划线和点
-        filename = re.sub(r'[_\s]+', '_', filename).strip('_.')
+        filename = UNDERSCORE_RUN.sub('_', filename).strip('_.')
         
         # 确保不以点开头或结尾
         filename = filename.strip('.')
         
-        # 限制长度
-        if len(filename.encode('utf-8')) > max_length:
-            result_name = ""
-            for char in filename:
-                test_result = result_name + char
-                if len(test_result.encode('utf-8')) > max_length:
-                    break
-                result_name = test_result
-            filename = result_name.strip()
+        # 按UTF-8字节长度截断，errors='ignore' 丢弃被截断的半个多字节字符
+        encoded = filename.encode('utf-8')
+        if len(encoded) > max_length:
+            filename = encoded[:max_length].decode('utf-8', 'ignore').strip()
             if not filename:
                 filename = default_name
         
@@ -186,6 +186,7 @@ class SubtitleProcessor:
                 await progress_callback(100, "处理完成")
             
             logger.info(f"从URL生成字幕完成: {result.get('title', 'unknown')}")
+            self._set_record_id(result, result.get('subtitle_file'))
             return result
             
         except Exception as e:
@@ -304,6 +305,7 @@ class SubtitleProcessor:
                 await progress_callback(100, "处理完成")
             
             logger.info(f"从文件生成字幕完成: {result.get('title', 'unknown')}")
+            self._set_record_id(result, result.get('subtitle_file'))
             return result
             
         except Exception as e:
@@ -389,6 +391,7 @@ class SubtitleProcessor:
                 await progress_callback(100, "翻译完成")
             
             logger.info(f"字幕翻译完成: {result.get('translated_file', 'unknown')}")
+            self._set_record_id(result, result.get('translated_file'))
             return result
             
         except Exception as e:
@@ -593,6 +596,12 @@ class SubtitleProcessor:
         except Exception:
             return False
     
+    @staticmethod
+    def _set_record_id(result: Dict[str, Any], subtitle_file: Optional[str]):
+        """记录字幕文件对应的下载记录ID（文件名去掉扩展名），接口直接使用，无需再解析文件名"""
+        if subtitle_file:
+            result['record_id'] = Path(subtitle_file).stem
+    
     def _is_task_cancelled(self, task_id: str) -> bool:
         """检查任务是否被取消"""
         try:
@@ -624,6 +633,10 @@ class SubtitleProcessor:
         return await self.translate_subtitle_file(*args, **kwargs)
 
     # 工具方法
+    def get_model_info(self) -> Dict[str, Any]:
+        """获取Whisper模型和设备信息"""
+        return self.model_manager.get_model_info()
+    
     def get_supported_languages(self) -> Dict[str, str]:
         """获取支持的语言列表"""
         return {
@@ -4,14 +4,28 @@ AVD Web版本 - WebSocket管理器
 管理WebSocket连接，用于实时推送下载进度和状态更新
 """
 
-import json
+import itertools
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Hashable, Optional
 from fastapi import WebSocket
 import asyncio
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# 单个连接最多积压的待发送消息数，超出时先丢弃最早的可合并进度消息，
+# 积压的全是完成/失败等不可丢弃的消息时关闭该慢速连接（客户端重连后重新获取状态）
+MAX_PENDING_MESSAGES = 256
+# 关闭慢速连接时使用的关闭码（1013: Try Again Later）
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# 单个batch帧最多合并的消息数，积压较多时分多帧发送，避免单帧过大
+MAX_BATCH_MESSAGES = 32
+
+
+def _dumps(message: Any) -> str:
+    """序列化消息为JSON文本（前端按文本帧JSON.parse解析）"""
+    return orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
 class WebSocketManager:
     """WebSocket连接管理器"""
     
@@ -19,6 +33,13 @@ class WebSocketManager:
         self.active_connections: List[WebSocket] = []
         self.connection_ids: Dict[WebSocket, str] = {}
         self._lock = asyncio.Lock()
+        
+        # 每个连接的待发送消息（已编码的JSON文本，按key合并，同一任务的进度只保留最新一条）和发送协程
+        self._pending: Dict[WebSocket, Dict[Hashable, str]] = {}
+        self._wakeups: Dict[WebSocket, asyncio.Event] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
+        self._message_seq = itertools.count()
+        self._closing: set = set()
     
     async def connect(self, websocket: WebSocket, connection_id: str = None):
         """接受WebSocket连接
@@ -34,6 +55,9 @@ class WebSocketManager:
                 self.active_connections.append(websocket)
                 if connection_id:
                     self.connection_ids[websocket] = connection_id
+                self._pending[websocket] = {}
+                self._wakeups[websocket] = asyncio.Event()
+                self._senders[websocket] = asyncio.create_task(self._sender_loop(websocket))
             
             logger.info(f"WebSocket连接已建立，当前活跃连接数: {len(self.active_connections)}")
             
@@ -61,6 +85,12 @@ class WebSocketManager:
             if websocket in self.connection_ids:
                 del self.connection_ids[websocket]
             
+            self._pending.pop(websocket, None)
+            self._wakeups.pop(websocket, None)
+            sender = self._senders.pop(websocket, None)
+            if sender is not None and sender is not asyncio.current_task():
+                sender.cancel()
+            
             logger.info(f"WebSocket连接已断开，当前活跃连接数: {len(self.active_connections)}")
             
         except Exception as e:
@@ -75,36 +105,115 @@ class WebSocketManager:
         """
         try:
             if websocket in self.active_connections:
-                message_str = json.dumps(message, ensure_ascii=False)
-                await websocket.send_text(message_str)
+                await websocket.send_text(_dumps(message))
             
         except Exception as e:
             logger.error(f"发送个人消息失败: {e}")
             # 如果发送失败，移除连接
             self.disconnect(websocket)
     
-    async def broadcast(self, message: Dict[str, Any]):
-        """广播消息给所有连接
+    def _enqueue(self, message: Dict[str, Any], key: Optional[Hashable] = None):
+        """将消息放入所有连接的发送队列（非阻塞）
         
         Args:
-            message: 要广播的消息
+            message: 要发送的消息
+            key: 合并键，相同key的未发送消息会被新消息覆盖；为None时不合并
         """
-        if not self.active_connections:
+        if not self._pending:
             return
         
-        message_str = json.dumps(message, ensure_ascii=False)
-        disconnected_connections = []
+        if key is None:
+            key = next(self._message_seq)
         
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_str)
-            except Exception as e:
-                logger.error(f"广播消息失败: {e}")
-                disconnected_connections.append(connection)
+        # 只序列化一次，所有连接共享同一份编码结果
+        encoded = _dumps(message)
+        slow_connections = []
+        for websocket, pending in self._pending.items():
+            if key not in pending and len(pending) >= MAX_PENDING_MESSAGES:
+                evictable = self._oldest_coalesced_key(pending)
+                if evictable is None:
+                    slow_connections.append(websocket)
+                    continue
+                pending.pop(evictable)
+            pending[key] = encoded
+            self._wakeups[websocket].set()
         
-        # 清理断开的连接
-        for connection in disconnected_connections:
-            self.disconnect(connection)
+        for websocket in slow_connections:
+            self._close_slow_connection(websocket)
+    
+    @staticmethod
+    def _oldest_coalesced_key(pending: Dict[Hashable, str]) -> Optional[Hashable]:
+        """返回最早的可合并消息的key（不合并的消息使用递增整数key，不会被丢弃）"""
+        for key in pending:
+            if not isinstance(key, int):
+                return key
+        return None
+    
+    def _close_slow_connection(self, websocket: WebSocket):
+        """积压的消息都不可丢弃时关闭慢速连接，而不是静默丢掉完成/失败通知"""
+        logger.warning(f"WebSocket连接积压超过 {MAX_PENDING_MESSAGES} 条消息，关闭慢速连接")
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close_quietly(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket):
+        """关闭连接，忽略连接已关闭等错误"""
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            # 连接可能已被客户端关闭
+            pass
+    
+    async def _sender_loop(self, websocket: WebSocket):
+        """单个连接的发送协程
+        
+        每次唤醒时取走积压的消息（最多MAX_BATCH_MESSAGES条），多条时合并为一个batch帧发送
+        """
+        pending = self._pending[websocket]
+        wakeup = self._wakeups[websocket]
+        
+        try:
+            while True:
+                await wakeup.wait()
+                wakeup.clear()
+                
+                if not pending:
+                    continue
+                
+                if len(pending) <= MAX_BATCH_MESSAGES:
+                    messages = list(pending.values())
+                    pending.clear()
+                else:
+                    keys = list(itertools.islice(pending, MAX_BATCH_MESSAGES))
+                    messages = [pending.pop(key) for key in keys]
+                    # 剩余消息在下一轮继续发送
+                    wakeup.set()
+                
+                # 直接拼接已编码的消息，避免按连接重复序列化
+                if len(messages) == 1:
+                    payload = messages[0]
+                else:
+                    payload = '{"type":"batch","messages":[' + ','.join(messages) + ']}'
+                
+                await websocket.send_text(payload)
+                
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"广播消息失败: {e}")
+            self.disconnect(websocket)
+    
+    async def broadcast(self, message: Dict[str, Any]):
+        """广播消息给所有连接
+        
+        消息进入各连接的发送队列，由发送协程批量发出
+        
+        Args:
+            message: 要广播的消息
+        """
+        self._enqueue(message)
     
     async def send_to_connection_id(self, message: Dict[str, Any], connection_id: str):
         """发送消息给特定连接ID
@@ -139,7 +248,8 @@ class WebSocketManager:
             "timestamp": progress_data.get("timestamp")
         }
         
-        await self.broadcast(message)
+        # 同一任务只保留最新的进度，慢速客户端不会积压过期帧
+        self._enqueue(message, key=("download_progress", task_id))
     
     async def send_download_completed(self, task_id: str, result_data: Dict[str, Any]):
         """发送下载完成通知
@@ -187,7 +297,8 @@ class WebSocketManager:
             "timestamp": progress_data.get("timestamp")
         }
         
-        await self.broadcast(message)
+        # 同一任务只保留最新的进度，慢速客户端不会积压过期帧
+        self._enqueue(message, key=("subtitle_progress", task_id))
     
     async def send_system_notification(self, notification: Dict[str, Any]):
         """发送系统通知
@@ -211,6 +322,16 @@ class WebSocketManager:
         """
         await self.broadcast(message)
     
+    def has_subscribers(self) -> bool:
+        """是否有可接收推送的连接
+        
+        进度消息广播给所有连接，没有连接时调用方可跳过构建消息
+        
+        Returns:
+            存在活跃连接时返回True
+        """
+        return bool(self._pending)
+    
     def get_connection_count(self) -> int:
         """获取当前活跃连接数
         
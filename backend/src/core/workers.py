@@ -0,0 +1,19 @@
+"""
+AVD Web版本 - Gunicorn worker
+
+与 main.py 中的 uvicorn.run 保持一致，显式使用 uvloop + httptools。
+UvicornWorker 默认的 "auto" 在依赖缺失时会静默回退到 asyncio/h11，
+这里固定配置，缺少依赖时启动直接报错。
+"""
+
+from uvicorn.workers import UvicornWorker
+
+
+class AvdUvicornWorker(UvicornWorker):
+    """使用 uvloop 事件循环和 httptools 解析器的 Uvicorn worker"""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "ws": "websockets",  # permessage-deflate在uvicorn中默认启用
+    }
@@ -4,7 +4,7 @@ AVD Web版本 - 下载任务数据模型
 定义下载任务相关的数据库模型
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, Float, DateTime, Text, Enum
+from sqlalchemy import Column, String, Integer, Boolean, Float, DateTime, Text, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
@@ -64,6 +64,12 @@ class DownloadTask(Base):
     started_at = Column(DateTime(timezone=True), nullable=True)  # 开始下载时间
     completed_at = Column(DateTime(timezone=True), nullable=True)  # 完成时间
     
+    # 下载记录列表按创建时间倒序分页，并可按平台筛选
+    __table_args__ = (
+        Index("ix_download_tasks_created_at", "created_at"),
+        Index("ix_download_tasks_platform_created_at", "platform", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<DownloadTask(id={self.id}, title={self.title}, status={self.status})>"
     
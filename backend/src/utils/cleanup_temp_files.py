@@ -7,7 +7,6 @@
 import os
 import sys
 import time
-import re
 import glob
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -17,6 +16,7 @@ from typing import List, Dict, Any
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from src.core.config import settings
+from src.utils.filename_utils import UUID_STEM_PATTERN
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -42,8 +42,8 @@ class TempFileCleanup:
             "subtitle_*"
         ]
         
-        # UUID格式的模式（用于识别自动生成的临时文件）
-        self.uuid_pattern = re.compile(r'^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}')
+        # UUID格式的模式（用于识别自动生成的临时文件，带连字符或32位十六进制）
+        self.uuid_pattern = UUID_STEM_PATTERN
     
     def is_uuid_filename(self, filename: str) -> bool:
         """检查文件名是否以UUID开头"""
@@ -3,15 +3,131 @@
 """
 
 import os
-import json
 import re
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 import urllib.parse
 import logging
 
+import orjson
+
+from .fs_utils import open_async, run_fs
+
 logger = logging.getLogger(__name__)
 
+# 文件系统禁用字符，str.translate一次删除
+INVALID_FILENAME_TABLE = str.maketrans('', '', '<>:"/\\|?*')
+WHITESPACE_RUN = re.compile(r'\s+')
+# 下载文件名最大UTF-8字节数
+MAX_FILENAME_BYTES = 200
+
+# 以UUID开头的文件名（带连字符或32位十六进制），UUID之后只能是结尾、_后缀或扩展名
+# 各模块统一使用这一个模式，match().group(0)即UUID部分
+UUID_STEM_PATTERN = re.compile(
+    r'^(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{32})(?=$|[_.])',
+    re.IGNORECASE
+)
+
+# 映射文件解析结果缓存：路径 -> (mtime_ns, size, 上次校验时间, 映射信息)，文件变化后自动失效
+MAPPING_CACHE_SIZE = 512
+# 缓存命中后在该时间内不再stat校验（映射文件上传后基本不会修改）
+MAPPING_REVALIDATE_SECONDS = 5.0
+_mapping_cache: "OrderedDict[str, Tuple[int, int, float, Dict[str, Any]]]" = OrderedDict()
+
+async def load_mapping_info(mapping_file) -> Optional[Dict[str, Any]]:
+    """读取文件映射信息（按mtime和大小缓存解析结果）
+    
+    Args:
+        mapping_file: 映射文件路径
+        
+    Returns:
+        映射信息字典（只读，不要修改），文件不存在时返回None
+    """
+    key = str(mapping_file)
+    now = time.monotonic()
+    
+    cached = _mapping_cache.get(key)
+    if cached is not None:
+        mtime_ns, size, checked_at, mapping_info = cached
+        if now - checked_at < MAPPING_REVALIDATE_SECONDS:
+            _mapping_cache.move_to_end(key)
+            return mapping_info
+        
+        try:
+            stat = await run_fs(os.stat, mapping_file)
+        except FileNotFoundError:
+            _mapping_cache.pop(key, None)
+            return None
+        
+        if stat.st_mtime_ns == mtime_ns and stat.st_size == size:
+            _mapping_cache[key] = (mtime_ns, size, now, mapping_info)
+            _mapping_cache.move_to_end(key)
+            return mapping_info
+    
+    # 直接打开文件，不存在时由异常判断，省去单独的exists检查
+    try:
+        async with open_async(mapping_file, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            mapping_info = orjson.loads(await f.read())
+    except FileNotFoundError:
+        return None
+    
+    _remember_mapping_info(key, stat, now, mapping_info)
+    return mapping_info
+
+async def save_mapping_info(mapping_file, mapping_info: Dict[str, Any]):
+    """写入文件映射信息，并直接放入解析结果缓存（上传后的首次读取无需再打开和解析文件）
+    
+    Args:
+        mapping_file: 映射文件路径
+        mapping_info: 映射信息（写入后不要再修改）
+    """
+    async with open_async(mapping_file, 'wb') as f:
+        await f.write(orjson.dumps(mapping_info, option=orjson.OPT_INDENT_2))
+        await f.flush()
+        stat = os.fstat(f.fileno())
+    
+    _remember_mapping_info(str(mapping_file), stat, time.monotonic(), mapping_info)
+
+def load_mapping_info_sync(mapping_file) -> Optional[Dict[str, Any]]:
+    """同步读取文件映射信息，与load_mapping_info共用解析结果缓存
+    
+    每次调用都stat校验，文件的mtime或大小变化后重新解析
+    
+    Args:
+        mapping_file: 映射文件路径
+        
+    Returns:
+        映射信息字典（只读，不要修改），文件不存在时返回None
+    """
+    key = str(mapping_file)
+    try:
+        stat = os.stat(mapping_file)
+    except FileNotFoundError:
+        _mapping_cache.pop(key, None)
+        return None
+    
+    now = time.monotonic()
+    cached = _mapping_cache.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        mapping_info = cached[3]
+    else:
+        with open(mapping_file, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            mapping_info = orjson.loads(f.read())
+    
+    _remember_mapping_info(key, stat, now, mapping_info)
+    return mapping_info
+
+def _remember_mapping_info(key: str, stat: os.stat_result, checked_at: float, mapping_info: Dict[str, Any]):
+    """放入映射信息缓存，超出容量时淘汰最久未使用的条目"""
+    _mapping_cache[key] = (stat.st_mtime_ns, stat.st_size, checked_at, mapping_info)
+    _mapping_cache.move_to_end(key)
+    if len(_mapping_cache) > MAPPING_CACHE_SIZE:
+        _mapping_cache.popitem(last=False)
+
 def get_original_filename_from_mapping(file_path: str, fallback_name: str = "download") -> str:
     """从映射文件获取原始文件名"""
     try:
@@ -19,33 +135,32 @@ def get_original_filename_from_mapping(file_path: str, fallback_name: str = "dow
         uuid_part = file_path_obj.stem
         
         # 处理带后缀的UUID文件名
-        if '_' in uuid_part:
-            potential_uuid = uuid_part.split('_')[0]
-            if len(potential_uuid) == 36 and potential_uuid.count('-') == 4:
-                uuid_part = potential_uuid
+        uuid_match = UUID_STEM_PATTERN.match(uuid_part)
+        if uuid_match:
+            uuid_part = uuid_match.group(0)
         
         # 查找映射文件
         mapping_file = file_path_obj.parent / f"{uuid_part}_mapping.json"
         
-        if mapping_file.exists():
-            with open(mapping_file, 'r', encoding='utf-8') as f:
-                mapping_data = json.load(f)
-            
-            # 优先使用original_filename
-            original_filename = mapping_data.get('original_filename')
-            if original_filename:
-                base_name = Path(original_filename).stem
-                logger.info(f"从映射文件恢复文件名: {original_filename} -> {base_name}")
-                return base_name
-            
-            # 尝试使用original_title
-            original_title = mapping_data.get('original_title')
-            if original_title:
-                clean_title = original_title.strip()
-                logger.info(f"从映射文件恢复标题: {original_title} -> {clean_title}")
-                return clean_title
-        
-        logger.warning(f"映射文件不存在: {mapping_file}")
+        mapping_data = load_mapping_info_sync(mapping_file)
+        if mapping_data is None:
+            logger.warning(f"映射文件不存在: {mapping_file}")
+            return fallback_name
+        
+        # 优先使用original_filename
+        original_filename = mapping_data.get('original_filename')
+        if original_filename:
+            base_name = Path(original_filename).stem
+            logger.info(f"从映射文件恢复文件名: {original_filename} -> {base_name}")
+            return base_name
+        
+        # 尝试使用original_title
+        original_title = mapping_data.get('original_title')
+        if original_title:
+            clean_title = original_title.strip()
+            logger.info(f"从映射文件恢复标题: {original_title} -> {clean_title}")
+            return clean_title
+        
         return fallback_name
         
     except Exception as e:
@@ -75,22 +190,17 @@ def sanitize_filename_for_download(filename: str) -> str:
         return "download"
     
     # 移除文件系统不支持的字符
-    clean_name = re.sub(r'[<>:"/\\|?*]', '', filename)
-    clean_name = re.sub(r'\s+', ' ', clean_name).strip()
+    clean_name = filename.translate(INVALID_FILENAME_TABLE)
+    clean_name = WHITESPACE_RUN.sub(' ', clean_name).strip()
     clean_name = clean_name.strip('. ')
     
     if not clean_name:
         return "download"
     
-    # 限制长度
-    if len(clean_name.encode('utf-8')) > 200:
-        result = ""
-        for char in clean_name:
-            test = result + char
-            if len(test.encode('utf-8')) > 200:
-                break
-            result = test
-        clean_name = result.strip() or "download"
+    # 按UTF-8字节长度截断，errors='ignore' 丢弃被截断的半个多字节字符
+    encoded = clean_name.encode('utf-8')
+    if len(encoded) > MAX_FILENAME_BYTES:
+        clean_name = encoded[:MAX_FILENAME_BYTES].decode('utf-8', 'ignore').strip() or "download"
     
     return clean_name
 
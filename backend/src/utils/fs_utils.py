@@ -0,0 +1,33 @@
+"""
+文件系统操作工具
+
+上传、下载、映射文件读写等阻塞文件操作共用一个有界线程池，
+不占用数据库等同步接口使用的默认线程池，并发量大时也不会无限制地创建线程
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+import aiofiles
+
+T = TypeVar("T")
+
+# 文件操作线程池
+FS_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+FS_EXECUTOR = ThreadPoolExecutor(max_workers=FS_MAX_WORKERS, thread_name_prefix="avd-fs")
+
+
+async def run_fs(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在文件操作线程池中执行阻塞函数"""
+    loop = asyncio.get_running_loop()
+    if kwargs:
+        func = functools.partial(func, **kwargs)
+    return await loop.run_in_executor(FS_EXECUTOR, func, *args)
+
+
+def open_async(file, mode: str = "r", **kwargs):
+    """使用文件操作线程池的 aiofiles.open"""
+    return aiofiles.open(file, mode, executor=FS_EXECUTOR, **kwargs)
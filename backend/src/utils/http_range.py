@@ -0,0 +1,85 @@
+"""
+HTTP Range请求工具
+
+断点续传用到的单段Range解析、文件验证器（ETag/Last-Modified）和If-Range判断（RFC 9110）
+"""
+
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+# 单段Range请求（bytes=start-end / bytes=start- / bytes=-suffix），多段请求按完整文件返回
+RANGE_PATTERN = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+def parse_range(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """解析单段Range请求头
+
+    Returns:
+        (起始字节, 结束字节)，请求头无法识别或语法无效（如起始大于结束）时返回None，按完整文件返回
+
+    Raises:
+        HTTPException: 范围无法满足（416）
+    """
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+
+    start_text, end_text = match.groups()
+    if start_text:
+        start = int(start_text)
+        if end_text and int(end_text) < start:
+            # 语法无效的范围按RFC 9110忽略Range头
+            return None
+        if start >= file_size:
+            raise _range_not_satisfiable(file_size)
+        end = min(int(end_text), file_size - 1) if end_text else file_size - 1
+    else:
+        # bytes=-N 表示最后N个字节
+        suffix_length = int(end_text)
+        if suffix_length == 0 or file_size == 0:
+            raise _range_not_satisfiable(file_size)
+        start = max(0, file_size - suffix_length)
+        end = file_size - 1
+
+    return start, end
+
+
+def _range_not_satisfiable(file_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=416,
+        detail="请求的范围无效",
+        headers={"Content-Range": f"bytes */{file_size}"}
+    )
+
+
+def file_validators(file_stat: os.stat_result) -> Dict[str, str]:
+    """根据文件stat生成强ETag和Last-Modified，文件内容变化（修改时间或大小）后随之变化"""
+    return {
+        "ETag": f'"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"',
+        "Last-Modified": formatdate(file_stat.st_mtime, usegmt=True),
+    }
+
+
+def if_range_matches(if_range: Optional[str], file_stat: os.stat_result) -> bool:
+    """判断If-Range条件是否成立，不成立时应忽略Range返回完整文件
+
+    If-Range可以是强ETag或HTTP日期；弱ETag和无法解析的日期都视为不成立
+    """
+    if if_range is None:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith('W/'):
+        return False
+    if if_range.startswith('"'):
+        return if_range == file_validators(file_stat)["ETag"]
+
+    try:
+        validator_time = parsedate_to_datetime(if_range).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(validator_time) == int(file_stat.st_mtime)
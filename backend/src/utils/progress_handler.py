@@ -1,11 +1,15 @@
 
 import asyncio
-import json
+import orjson
 from typing import Callable, Optional
 import queue
 import threading
 import time
 
+def _sse_event(data: dict) -> bytes:
+    """编码SSE数据帧（orjson直接输出UTF-8字节，无需再编码）"""
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
 class ProgressHandler:
     """改进的进度处理器，解决前后端同步问题"""
     
@@ -50,7 +54,7 @@ class ProgressHandler:
                         'timestamp': data['timestamp']
                     }
                     
-                    yield f"data: {json.dumps(sse_data)}\n\n"
+                    yield _sse_event(sse_data)
                     
                 except asyncio.TimeoutError:
                     # 发送心跳保持连接
@@ -60,7 +64,7 @@ class ProgressHandler:
                         'message': self.current_message,
                         'timestamp': time.time()
                     }
-                    yield f"data: {json.dumps(heartbeat)}\n\n"
+                    yield _sse_event(heartbeat)
                     
         finally:
             self.is_active = False
@@ -76,7 +80,7 @@ async def example_usage():
     # 启动进度流
     async def progress_stream():
         async for data in progress_handler.get_progress_stream():
-            print(data.strip())  # 在实际使用中这里是yield到客户端
+            print(data.decode().strip())  # 在实际使用中这里是yield到客户端
     
     # 模拟任务进度
     async def simulate_task():
@@ -0,0 +1,194 @@
+"""
+上传文件处理工具
+
+新旧字幕路由共用的上传逻辑：校验扩展名、分块流式写盘、保存文件名映射
+"""
+
+import hashlib
+import os
+import uuid
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from .filename_utils import save_mapping_info
+from .fs_utils import open_async, run_fs
+
+logger = logging.getLogger(__name__)
+
+# 上传文件分块写入大小（1MB）
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 最近上传文件的内容摘要：sha256 -> 文件路径，相同内容的重复上传改为硬链接
+UPLOAD_DIGEST_CACHE_SIZE = 1024
+_upload_digests: "OrderedDict[str, str]" = OrderedDict()
+
+
+async def stream_upload_to_file(
+    file: UploadFile,
+    file_path: str,
+    max_size: Optional[int] = None,
+    drop_cache: bool = False,
+) -> int:
+    """分块流式写入上传文件，避免把整个文件读入内存
+
+    Args:
+        file: 上传的文件
+        file_path: 目标文件路径
+        max_size: 最大字节数，超出时中止写入（None表示不限制）
+        drop_cache: 写入完成后落盘并通知内核丢弃该文件的页缓存（很少再读取的文件使用）
+
+    Returns:
+        写入的字节数
+
+    Raises:
+        HTTPException: 文件超过max_size（413）
+    """
+    # 先写入临时文件，完成后原子重命名，其他请求不会读到写了一半的文件
+    part_path = f"{file_path}.part"
+    file_size = 0
+    digest = hashlib.sha256()
+    try:
+        async with open_async(part_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if max_size is not None and file_size > max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"文件过大，最大支持 {max_size // (1024 * 1024)}MB"
+                    )
+                digest.update(chunk)
+                await buffer.write(chunk)
+
+            if drop_cache and file_size > 0 and hasattr(os, "posix_fadvise"):
+                await buffer.flush()
+                await run_fs(_drop_page_cache, buffer.fileno())
+
+        await run_fs(os.replace, part_path, file_path)
+    except BaseException:
+        # 写入中断或超出大小限制时删除不完整的文件
+        await run_fs(_remove_if_exists, part_path)
+        raise
+
+    if file_size > 0:
+        existing = _remember_upload_digest(digest.hexdigest(), file_path)
+        if existing is not None:
+            await run_fs(_link_existing_upload, existing, file_path, file_size)
+
+    return file_size
+
+
+def _drop_page_cache(fd: int):
+    """落盘后丢弃文件的页缓存，避免一次性写入的大文件挤占热点数据的缓存"""
+    try:
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError as e:
+        logger.debug(f"丢弃页缓存失败: {e}")
+
+
+def _remove_if_exists(path: str):
+    """删除文件，文件不存在时忽略"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remember_upload_digest(hexdigest: str, file_path: str) -> Optional[str]:
+    """记录上传内容摘要，返回之前上传的相同内容文件路径（没有时返回None）
+
+    只在事件循环中调用，摘要缓存不需要加锁
+    """
+    existing = _upload_digests.get(hexdigest)
+    _upload_digests[hexdigest] = file_path
+    _upload_digests.move_to_end(hexdigest)
+    if len(_upload_digests) > UPLOAD_DIGEST_CACHE_SIZE:
+        _upload_digests.popitem(last=False)
+
+    if existing == file_path:
+        return None
+    return existing
+
+
+def _link_existing_upload(existing: str, file_path: str, file_size: int):
+    """用指向已有文件的硬链接替换刚写入的副本（阻塞操作，通过run_fs调用）
+
+    硬链接共享原文件的inode和修改时间，替换后刷新修改时间，
+    避免按mtime判断文件年龄的清理任务删除刚上传、仍在处理中的文件
+    """
+    temp_link = f"{file_path}.link"
+    try:
+        if os.path.getsize(existing) != file_size:
+            return
+        os.link(existing, temp_link)
+        os.replace(temp_link, file_path)
+        os.utime(file_path)
+        logger.info(f"重复上传，复用已有文件: {file_path} -> {existing}")
+    except OSError:
+        # 原文件已被清理或文件系统不支持硬链接时保留新写入的副本，并删除可能残留的临时链接
+        try:
+            _remove_if_exists(temp_link)
+        except OSError:
+            pass
+
+
+async def save_upload_streamed(
+    file: UploadFile,
+    dest_dir: str,
+    allowed_exts: FrozenSet[str],
+    video_exts: FrozenSet[str],
+) -> Tuple[str, Dict[str, Any]]:
+    """保存上传文件并写入映射文件
+
+    Args:
+        file: 上传的文件
+        dest_dir: 保存目录
+        allowed_exts: 允许的扩展名（小写，带点）
+        video_exts: 视频文件扩展名，用于区分文件类型
+
+    Returns:
+        (文件ID, 映射信息)
+
+    Raises:
+        HTTPException: 未选择文件、格式不支持或文件为空
+    """
+    if not file or not file.filename:
+        raise HTTPException(status_code=400, detail="没有选择文件")
+
+    # 检查文件类型，去掉扩展名作为标题
+    original_title, file_ext = os.path.splitext(os.path.basename(file.filename))
+    file_ext = file_ext.lower()
+    if file_ext not in allowed_exts:
+        raise HTTPException(status_code=400, detail="不支持的文件格式")
+
+    # 生成文件ID和路径
+    file_id = str(uuid.uuid4())
+    filename = f"{file_id}{file_ext}"
+    file_path = os.path.join(dest_dir, filename)
+
+    file_size = await stream_upload_to_file(file, file_path)
+
+    if file_size == 0:
+        await run_fs(os.remove, file_path)
+        raise HTTPException(status_code=400, detail="上传的文件为空")
+
+    # 在同一目录下保存映射信息
+    mapping_file = os.path.join(dest_dir, f"{file_id}_mapping.json")
+    mapping_info = {
+        "original_filename": file.filename,
+        "original_title": original_title,
+        "uuid_filename": filename,
+        "file_path": file_path,
+        "upload_time": datetime.utcnow().isoformat(),
+        "file_size": file_size,
+        "file_type": "video" if file_ext in video_exts else "subtitle"
+    }
+
+    await save_mapping_info(mapping_file, mapping_info)
+
+    logger.info(f"文件上传成功: {file_path}")
+    return file_id, mapping_info
@@ -7,6 +7,15 @@ AVD Web版本 - 验证器模块
 import re
 from urllib.parse import urlparse
 
+# 基本的域名格式（模块加载时编译一次）
+DOMAIN_PATTERN = re.compile(
+    r'^[a-zA-Z0-9]'  # 开始字符
+    r'[a-zA-Z0-9\-\.]*'  # 中间字符
+    r'[a-zA-Z0-9]$'  # 结束字符
+)
+
+SUPPORTED_SCHEMES = frozenset(('http', 'https'))
+
 
 def validate_url(url: str) -> bool:
     """验证URL格式是否正确
@@ -29,17 +38,11 @@ def validate_url(url: str) -> bool:
             return False
         
         # 检查协议是否支持
-        if parsed.scheme.lower() not in ['http', 'https']:
+        if parsed.scheme.lower() not in SUPPORTED_SCHEMES:
             return False
         
         # 基本的域名格式检查
-        domain_pattern = re.compile(
-            r'^[a-zA-Z0-9]'  # 开始字符
-            r'[a-zA-Z0-9\-\.]*'  # 中间字符
-            r'[a-zA-Z0-9]$'  # 结束字符
-        )
-        
-        if not domain_pattern.match(parsed.netloc.split(':')[0]):
+        if not DOMAIN_PATTERN.match(parsed.netloc.split(':')[0]):
             return False
         
         return True
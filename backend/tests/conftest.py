@@ -0,0 +1,11 @@
+"""
+测试公共配置
+
+导入应用模块前把数据库指向临时文件，避免测试读写 data/avd.db
+"""
+
+import os
+import tempfile
+
+_test_db_dir = tempfile.mkdtemp(prefix="avd-test-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_test_db_dir, 'test.db')}")
@@ -0,0 +1,48 @@
+"""
+响应缓存进程内回退的回归测试
+"""
+
+from src.core.cache import ResponseCache
+
+
+async def test_local_cache_returns_independent_copies():
+    cache = ResponseCache("redis://unused")
+    await cache.set("k", {"title": "a", "formats": ["mp4"]}, expire=60)
+
+    first = await cache.get("k")
+    first["title"] = "changed"
+    first["formats"].append("webm")
+
+    assert await cache.get("k") == {"title": "a", "formats": ["mp4"]}
+
+
+async def test_local_cache_expires():
+    cache = ResponseCache("redis://unused")
+    await cache.set("k", {"v": 1}, expire=-1)
+
+    assert await cache.get("k") is None
+
+
+class _FakeRedis:
+    """只实现get/set的Redis替身，按字节保存值"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+async def test_redis_and_local_round_trip_the_same_value():
+    value = {1: "int key", "items": [1.5, None]}
+    local = ResponseCache("redis://unused")
+    remote = ResponseCache("redis://unused")
+    remote._redis = _FakeRedis()
+
+    await local.set("k", value, expire=60)
+    await remote.set("k", value, expire=60)
+
+    assert await remote.get("k") == await local.get("k") == {"1": "int key", "items": [1.5, None]}
@@ -0,0 +1,53 @@
+"""
+临时文件清理的文件名识别回归测试
+"""
+
+import os
+import time
+import uuid
+
+import pytest
+
+from src.utils.cleanup_temp_files import TempFileCleanup
+
+
+@pytest.fixture
+def cleanup(tmp_path):
+    instance = TempFileCleanup()
+    instance.files_path = str(tmp_path)
+    return instance
+
+
+@pytest.mark.parametrize("filename", [
+    f"{uuid.uuid4()}.mp4",
+    f"{uuid.uuid4()}_mapping.json",
+    f"{uuid.uuid4().hex}.mp4",
+    f"{uuid.uuid4().hex}_mapping.json",
+])
+def test_uuid_filenames_are_recognised(cleanup, filename):
+    assert cleanup.is_uuid_filename(filename)
+
+
+@pytest.mark.parametrize("filename", [
+    "movie.mp4",
+    "abcdef.srt",
+    "0123456789abcdef.mp4",
+])
+def test_regular_filenames_are_not_uuid(cleanup, filename):
+    assert not cleanup.is_uuid_filename(filename)
+
+
+def test_old_hex_named_uploads_are_swept(cleanup, tmp_path):
+    old = time.time() - 3600
+    hex_id = uuid.uuid4().hex
+    stale = [tmp_path / f"{hex_id}.mp4", tmp_path / f"{hex_id}_mapping.json"]
+    kept = tmp_path / "movie.mp4"
+    for path in stale + [kept]:
+        path.write_bytes(b"x")
+        os.utime(path, (old, old))
+
+    result = cleanup.cleanup_processed_upload_files(max_age_hours=0.5)
+
+    assert result["files_deleted"] == 2
+    assert not any(path.exists() for path in stale)
+    assert kept.exists()
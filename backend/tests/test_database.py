@@ -0,0 +1,89 @@
+"""
+数据库连接池回归测试
+
+同步接口在线程池中并发执行，每个会话必须使用独立的SQLite连接
+"""
+
+import threading
+
+import pytest
+
+from src.core.database import Base, SessionLocal, engine
+from src.models.downloads import SystemSettings
+
+
+@pytest.fixture(autouse=True)
+def _tables():
+    Base.metadata.create_all(bind=engine)
+    yield
+    with SessionLocal() as db:
+        db.query(SystemSettings).delete()
+        db.commit()
+
+
+def test_sessions_do_not_share_connection():
+    with SessionLocal() as a, SessionLocal() as b:
+        conn_a = a.connection().connection.dbapi_connection
+        conn_b = b.connection().connection.dbapi_connection
+        assert conn_a is not conn_b
+
+
+def test_concurrent_rollback_does_not_discard_other_transaction():
+    """一个请求回滚时不应撤销另一个线程中尚未提交的写入"""
+    written = threading.Barrier(2)
+    rolled_back = threading.Event()
+    errors = []
+
+    def committer():
+        try:
+            with SessionLocal() as db:
+                db.add(SystemSettings(key="kept", value="1"))
+                db.flush()
+                written.wait(timeout=5)
+                rolled_back.wait(timeout=5)
+                db.commit()
+        except Exception as e:  # pragma: no cover - 失败时在断言中报告
+            errors.append(e)
+
+    def rollbacker():
+        try:
+            with SessionLocal() as db:
+                written.wait(timeout=5)
+                db.query(SystemSettings).filter(SystemSettings.key == "missing").first()
+                db.rollback()
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+        finally:
+            rolled_back.set()
+
+    threads = [threading.Thread(target=committer), threading.Thread(target=rollbacker)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    assert not errors
+    with SessionLocal() as db:
+        assert db.query(SystemSettings).filter(SystemSettings.key == "kept").count() == 1
+
+
+def test_concurrent_writes_from_threadpool():
+    errors = []
+
+    def worker(n):
+        try:
+            with SessionLocal() as db:
+                db.add(SystemSettings(key=f"k{n}", value=str(n)))
+                db.commit()
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+
+    assert not errors
+    with SessionLocal() as db:
+        assert db.query(SystemSettings).count() == 20
@@ -0,0 +1,68 @@
+"""
+文件名和映射文件工具回归测试
+"""
+
+import pytest
+
+from src.utils import filename_utils
+
+
+def test_sync_loader_reparses_after_rewrite(tmp_path):
+    mapping_file = tmp_path / "a_mapping.json"
+    mapping_file.write_bytes(b'{"original_title": "first"}')
+
+    first = filename_utils.load_mapping_info_sync(mapping_file)
+    assert first == {"original_title": "first"}
+    assert filename_utils.load_mapping_info_sync(mapping_file) is first
+
+    mapping_file.write_bytes(b'{"original_title": "second!"}')
+    assert filename_utils.load_mapping_info_sync(mapping_file) == {"original_title": "second!"}
+
+
+def test_sync_loader_missing_file_returns_none(tmp_path):
+    assert filename_utils.load_mapping_info_sync(tmp_path / "missing_mapping.json") is None
+
+
+async def test_sync_and_async_loaders_share_cache(tmp_path):
+    mapping_file = tmp_path / "b_mapping.json"
+    mapping_info = {"original_filename": "movie.mp4"}
+    await filename_utils.save_mapping_info(mapping_file, mapping_info)
+
+    assert filename_utils.load_mapping_info_sync(mapping_file) is mapping_info
+    assert await filename_utils.load_mapping_info(str(mapping_file)) is mapping_info
+
+
+@pytest.mark.parametrize("stem, uuid_part", [
+    ("3f2b6c1e-8d4a-4f6e-9b1a-2c3d4e5f6a7b", "3f2b6c1e-8d4a-4f6e-9b1a-2c3d4e5f6a7b"),
+    ("0123456789ABCDEF0123456789abcdef_zh_subtitles", "0123456789ABCDEF0123456789abcdef"),
+    ("0123456789abcdef0123456789abcdef.srt", "0123456789abcdef0123456789abcdef"),
+])
+def test_uuid_stem_pattern_accepts_uuid_prefixes(stem, uuid_part):
+    assert filename_utils.UUID_STEM_PATTERN.match(stem).group(0) == uuid_part
+
+
+@pytest.mark.parametrize("stem", [
+    "0123456789abcdef0123456789abcdef01234567",
+    "0123456789abcdef0123456789abcdeg",
+    "movie_subtitles",
+])
+def test_uuid_stem_pattern_rejects_other_names(stem):
+    assert filename_utils.UUID_STEM_PATTERN.match(stem) is None
+
+
+def test_original_filename_ignores_non_hex_32_char_prefix(tmp_path):
+    stem = "abcdefghijklmnopqrstuvwxyz012345"
+    (tmp_path / f"{stem}_mapping.json").write_bytes(b'{"original_filename": "wrong.mp4"}')
+
+    name = filename_utils.get_original_filename_from_mapping(str(tmp_path / f"{stem}_subtitles.srt"))
+
+    assert name == "download"
+
+
+def test_original_filename_from_hex_uuid_prefix(tmp_path):
+    stem = "0123456789abcdef0123456789abcdef"
+    (tmp_path / f"{stem}_mapping.json").write_bytes(b'{"original_filename": "movie.mp4"}')
+
+    name = filename_utils.get_original_filename_from_mapping(str(tmp_path / f"{stem}_subtitles.srt"))
+
+    assert name == "movie"
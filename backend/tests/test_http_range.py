@@ -0,0 +1,78 @@
+"""
+Range请求解析和If-Range判断回归测试
+"""
+
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from src.utils.http_range import file_validators, if_range_matches, parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=10-", (10, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+])
+def test_valid_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=-",
+    "items=0-10",
+    "bytes=0-10,20-30",
+    "bytes=20-10",
+])
+def test_unrecognised_or_invalid_ranges_are_ignored(header):
+    """语法无效（包括起始大于结束）的Range按完整文件返回，而不是416"""
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=1000-2000", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(HTTPException) as exc_info:
+        parse_range(header, size)
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers["Content-Range"] == f"bytes */{size}"
+
+
+@pytest.fixture
+def file_stat(tmp_path):
+    path = tmp_path / "a.srt"
+    path.write_bytes(b"1\n00:00:00,000 --> 00:00:01,000\nhi\n")
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    return os.stat(path)
+
+
+def test_if_range_absent_allows_range(file_stat):
+    assert if_range_matches(None, file_stat)
+
+
+def test_if_range_matches_current_etag(file_stat):
+    assert if_range_matches(file_validators(file_stat)["ETag"], file_stat)
+
+
+def test_if_range_rejects_stale_or_weak_etag(file_stat):
+    assert not if_range_matches('"stale"', file_stat)
+    assert not if_range_matches("W/" + file_validators(file_stat)["ETag"], file_stat)
+
+
+def test_if_range_date(file_stat):
+    assert if_range_matches(file_validators(file_stat)["Last-Modified"], file_stat)
+    assert not if_range_matches("Tue, 01 Jan 2019 00:00:00 GMT", file_stat)
+    assert not if_range_matches("not a date", file_stat)
+
+
+def test_etag_changes_with_content(tmp_path, file_stat):
+    path = tmp_path / "a.srt"
+    path.write_bytes(b"changed")
+    assert file_validators(os.stat(path))["ETag"] != file_validators(file_stat)["ETag"]
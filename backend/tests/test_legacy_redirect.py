@@ -0,0 +1,30 @@
+"""
+旧文件路径重定向回归测试
+"""
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("faster_whisper")
+pytest.importorskip("yt_dlp")
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("prefix", ["/uploads", "/downloads"])
+def test_special_characters_are_reencoded(prefix):
+    response = client.get(f"{prefix}/a%20b%231%25.mp4", follow_redirects=False)
+
+    assert response.status_code == 308
+    assert response.headers["location"] == "/files/a%20b%231%25.mp4"
+
+
+def test_query_string_is_preserved():
+    response = client.head("/uploads/x%3Fy.srt?download=1", follow_redirects=False)
+
+    assert response.status_code == 308
+    assert response.headers["location"] == "/files/x%3Fy.srt?download=1"
@@ -0,0 +1,28 @@
+"""
+字幕下载响应头回归测试
+"""
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("faster_whisper")
+
+from src.api.routers.subtitles import _content_disposition
+
+
+def test_plain_ascii_name_uses_filename_parameter():
+    assert _content_disposition("movie.srt") == 'attachment; filename="movie.srt"'
+
+
+@pytest.mark.parametrize("filename", [
+    "evil\r\nSet-Cookie: a=b.srt",
+    "tab\there.srt",
+    'quote".srt',
+    "back\\slash.srt",
+    "中文字幕.srt",
+])
+def test_unsafe_names_are_percent_encoded(filename):
+    header = _content_disposition(filename)
+
+    assert header.startswith("attachment; filename*=utf-8''")
+    assert not any(char in header for char in '\r\n\t"\\')
@@ -0,0 +1,112 @@
+"""
+旧版字幕文件下载接口回归测试
+"""
+
+import os
+import uuid
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("faster_whisper")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.api.routers.subtitles_old import subtitle_files
+
+
+@pytest.fixture
+def files_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "FILES_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "USE_X_ACCEL", False)
+    return tmp_path
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(subtitle_files.router)
+    return TestClient(app)
+
+
+def _subtitle(files_dir, content=b"0123456789"):
+    record_id = uuid.uuid4().hex
+    (files_dir / f"{record_id}_subtitles.srt").write_bytes(content)
+    return record_id
+
+
+def test_non_dict_mapping_falls_back_to_file_name(files_dir, client):
+    record_id = _subtitle(files_dir)
+    (files_dir / f"{record_id}_mapping.json").write_text("[1, 2]")
+
+    response = client.get(f"/download/{record_id}")
+
+    assert response.status_code == 200
+    assert f"{record_id}_subtitles.srt" in response.headers["content-disposition"]
+
+
+def test_range_response_carries_validators(files_dir, client):
+    record_id = _subtitle(files_dir)
+
+    full = client.get(f"/download/{record_id}")
+    partial = client.get(f"/download/{record_id}", headers={"Range": "bytes=2-4"})
+
+    assert partial.status_code == 206
+    assert partial.content == b"234"
+    assert partial.headers["etag"] == full.headers["etag"]
+    assert "last-modified" in partial.headers
+
+
+def test_invalid_range_returns_full_file(files_dir, client):
+    record_id = _subtitle(files_dir)
+
+    response = client.get(f"/download/{record_id}", headers={"Range": "bytes=5-2"})
+
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+
+
+def test_stale_if_range_returns_full_file(files_dir, client):
+    record_id = _subtitle(files_dir)
+
+    response = client.get(
+        f"/download/{record_id}", headers={"Range": "bytes=2-4", "If-Range": '"stale"'}
+    )
+
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+
+
+def _age(path, seconds):
+    past = path.stat().st_mtime - seconds
+    os.utime(path, (past, past))
+
+
+def test_latest_subtitle_follows_in_place_rewrite(tmp_path, monkeypatch):
+    monkeypatch.setattr(subtitle_files, "_subtitle_listing", (-1, None, ()))
+    older = tmp_path / "older.srt"
+    newer = tmp_path / "newer.srt"
+    older.write_text("1")
+    newer.write_text("2")
+    _age(older, 20)
+    _age(newer, 10)
+    _age(tmp_path, 30)
+
+    assert subtitle_files._find_subtitle_file(tmp_path, "missing")[0] == newer
+
+    dir_mtime_ns = tmp_path.stat().st_mtime_ns
+    older.write_text("rewritten")
+    assert tmp_path.stat().st_mtime_ns == dir_mtime_ns
+
+    assert subtitle_files._find_subtitle_file(tmp_path, "missing")[0] == older
+
+
+def test_recently_modified_directory_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(subtitle_files, "_subtitle_listing", (-1, None, ()))
+    (tmp_path / "first.srt").write_text("1")
+
+    subtitle_files._find_subtitle_file(tmp_path, "missing")
+
+    assert subtitle_files._subtitle_listing == (-1, None, ())
@@ -0,0 +1,115 @@
+"""
+字幕任务管理器回归测试
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("faster_whisper")
+
+from fastapi import HTTPException
+
+from src.api.routers import subtitles
+
+
+@pytest.fixture
+async def manager(monkeypatch):
+    monkeypatch.setattr(subtitles, "MAX_TASKS", 3)
+    monkeypatch.setattr(subtitles.websocket_manager, "has_subscribers", lambda: False)
+    instance = subtitles.SimpleTaskManager()
+    yield instance
+    if instance._sweeper is not None:
+        instance._sweeper.cancel()
+        await asyncio.sleep(0)
+
+
+async def test_running_tasks_are_never_evicted(manager):
+    for n in range(3):
+        manager.create_task(f"t{n}", "translate", {})
+    await manager.update_task("t0", status="running")
+
+    with pytest.raises(HTTPException) as exc_info:
+        manager.create_task("t3", "translate", {})
+
+    assert exc_info.value.status_code == 503
+    assert set(manager.tasks) == {"t0", "t1", "t2"}
+
+
+async def test_oldest_finished_task_is_evicted_first(manager):
+    for n in range(3):
+        manager.create_task(f"t{n}", "translate", {})
+    await manager.update_task("t2", status="completed", progress=100)
+    manager.cancel_task("t1")
+
+    manager.create_task("t3", "translate", {})
+    assert set(manager.tasks) == {"t0", "t1", "t3"}
+
+    manager.create_task("t4", "translate", {})
+    assert set(manager.tasks) == {"t0", "t3", "t4"}
+
+
+async def test_cleanup_forgets_finished_task(manager):
+    manager.create_task("t0", "translate", {})
+    await manager.update_task("t0", status="failed")
+    manager.cleanup_task("t0")
+
+    assert not manager._finished
+
+
+async def test_throttled_progress_is_flushed_when_window_closes(manager, monkeypatch):
+    monkeypatch.setattr(subtitles, "PROGRESS_PUSH_INTERVAL", 0.05)
+    pushed = []
+
+    async def record(task_id, task_info):
+        pushed.append(task_info["progress"])
+
+    monkeypatch.setattr(manager, "_send_progress_update", record)
+    manager.create_task("t0", "translate", {})
+
+    await manager.update_task("t0", status="running", progress=10.0)
+    await manager.update_task("t0", progress=10.2)
+    await manager.update_task("t0", progress=10.4)
+    assert pushed == [10.0]
+
+    await asyncio.sleep(0.1)
+    assert pushed == [10.0, 10.4]
+    assert not manager._trailing_pushes
+
+
+async def test_trailing_push_is_cancelled_on_cleanup(manager, monkeypatch):
+    monkeypatch.setattr(subtitles, "PROGRESS_PUSH_INTERVAL", 0.05)
+    pushed = []
+
+    async def record(task_id, task_info):
+        pushed.append(task_info["progress"])
+
+    monkeypatch.setattr(manager, "_send_progress_update", record)
+    manager.create_task("t0", "translate", {})
+    await manager.update_task("t0", status="running", progress=10.0)
+    await manager.update_task("t0", progress=10.2)
+
+    manager.cleanup_task("t0")
+    await asyncio.sleep(0.1)
+
+    assert pushed == [10.0]
+    assert "t0" not in manager._task_locks
+
+
+async def test_queue_position_follows_queue_drain(manager, monkeypatch):
+    monkeypatch.setattr(subtitles, "task_manager", manager)
+    monkeypatch.setattr(subtitles, "queued_task_ids", {})
+    for n in range(3):
+        manager.create_task(f"t{n}", "translate", {})
+        subtitles.queued_task_ids[f"t{n}"] = None
+
+    assert subtitles._get_queue_position("t2") == 3
+
+    subtitles.queued_task_ids.pop("t0")
+    await manager.update_task("t0", status="running")
+    assert subtitles._get_queue_position("t2") == 2
+
+    await manager.update_task("t1", status="cancelled")
+    assert subtitles._get_queue_position("t2") == 1
+    assert subtitles._get_queue_position("t0") is None
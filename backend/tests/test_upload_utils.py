@@ -0,0 +1,124 @@
+"""
+上传去重回归测试
+"""
+
+import io
+import os
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from src.utils import upload_utils
+
+
+@pytest.fixture(autouse=True)
+def _clear_digests():
+    upload_utils._upload_digests.clear()
+    yield
+    upload_utils._upload_digests.clear()
+
+
+async def _upload(path, data: bytes) -> int:
+    return await upload_utils.stream_upload_to_file(UploadFile(io.BytesIO(data), filename="x.mp4"), str(path))
+
+
+async def test_duplicate_upload_is_hard_linked(tmp_path):
+    first, second = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    await _upload(first, b"same content")
+    await _upload(second, b"same content")
+
+    assert os.path.samefile(first, second)
+
+
+async def test_duplicate_upload_gets_fresh_mtime(tmp_path):
+    """复用旧文件的inode后，新上传文件的修改时间不能沿用旧文件的时间"""
+    first, second = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    await _upload(first, b"same content")
+    old = time.time() - 10 * 24 * 3600
+    os.utime(first, (old, old))
+
+    await _upload(second, b"same content")
+
+    assert os.path.samefile(first, second)
+    assert time.time() - os.path.getmtime(second) < 60
+
+
+async def test_different_content_is_not_linked(tmp_path):
+    first, second = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    await _upload(first, b"one")
+    await _upload(second, b"two")
+
+    assert not os.path.samefile(first, second)
+    assert second.read_bytes() == b"two"
+
+
+async def test_oversized_upload_leaves_no_partial_file(tmp_path):
+    target = tmp_path / "big.mp4"
+
+    with pytest.raises(HTTPException) as exc_info:
+        await upload_utils.stream_upload_to_file(
+            UploadFile(io.BytesIO(b"x" * 10), filename="big.mp4"), str(target), max_size=4
+        )
+
+    assert exc_info.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_finalize_runs_in_fs_pool(tmp_path, monkeypatch):
+    threads = []
+    real_replace = os.replace
+
+    def recording_replace(src, dst):
+        threads.append(threading.current_thread().name)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", recording_replace)
+    await _upload(tmp_path / "a.mp4", b"content")
+
+    assert threads and all(name.startswith("avd-fs") for name in threads)
+
+
+async def test_empty_upload_is_rejected_and_removed(tmp_path):
+    with pytest.raises(HTTPException) as exc_info:
+        await upload_utils.save_upload_streamed(
+            UploadFile(io.BytesIO(b""), filename="empty.srt"),
+            str(tmp_path), frozenset({".srt"}), frozenset()
+        )
+
+    assert exc_info.value.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_dedupe_link_runs_in_fs_pool(tmp_path, monkeypatch):
+    threads = []
+    real_link = os.link
+
+    def recording_link(src, dst):
+        threads.append(threading.current_thread().name)
+        real_link(src, dst)
+
+    monkeypatch.setattr(os, "link", recording_link)
+    await _upload(tmp_path / "a.mp4", b"same content")
+    await _upload(tmp_path / "b.mp4", b"same content")
+
+    assert threads and all(name.startswith("avd-fs") for name in threads)
+
+
+async def test_failed_dedupe_leaves_no_temp_link(tmp_path, monkeypatch):
+    first, second = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    await _upload(first, b"same content")
+    real_replace = os.replace
+
+    def failing_replace(src, dst):
+        if src.endswith(".link"):
+            raise OSError("replace failed")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    await _upload(second, b"same content")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.mp4", "b.mp4"]
+    assert not os.path.samefile(first, second)
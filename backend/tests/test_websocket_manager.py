@@ -0,0 +1,86 @@
+"""
+WebSocket发送队列积压处理回归测试
+"""
+
+import asyncio
+
+import pytest
+import orjson
+
+from src.core import websocket_manager as wm
+
+
+class SlowWebSocket:
+    """连接确认消息之后的发送一直阻塞，模拟不读取数据的慢速客户端"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+        self._release = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+        if len(self.sent) > 1:
+            await self._release.wait()
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+@pytest.fixture
+async def connected(monkeypatch):
+    monkeypatch.setattr(wm, "MAX_PENDING_MESSAGES", 4)
+    manager = wm.WebSocketManager()
+    websocket = SlowWebSocket()
+    await manager.connect(websocket, "c1")
+    # 先让发送协程卡在一条消息上，后续消息全部积压
+    await manager.send_download_progress("blocker", {})
+    await asyncio.sleep(0)
+    yield manager, websocket
+    manager.disconnect(websocket)
+    await asyncio.sleep(0)
+
+
+def _pending_types(manager, websocket):
+    return [orjson.loads(text)["type"] for text in manager._pending[websocket].values()]
+
+
+async def test_progress_is_evicted_before_terminal_messages(connected):
+    manager, websocket = connected
+
+    await manager.send_download_completed("t0", {})
+    for n in range(1, 4):
+        await manager.send_download_progress(f"t{n}", {"progress": n})
+    await manager.send_download_failed("t9", {})
+
+    types = _pending_types(manager, websocket)
+    assert types.count("download_completed") == 1
+    assert types.count("download_failed") == 1
+    assert len(types) == 4
+
+
+async def test_slow_connection_is_closed_instead_of_dropping_terminal_messages(connected):
+    manager, websocket = connected
+
+    for n in range(4):
+        await manager.send_download_completed(f"t{n}", {})
+    await manager.send_download_failed("t9", {})
+    await asyncio.sleep(0)
+
+    assert websocket not in manager.active_connections
+    assert websocket not in manager._pending
+    assert websocket.closed_with == wm.SLOW_CONSUMER_CLOSE_CODE
+
+
+async def test_progress_for_same_task_is_coalesced(connected):
+    manager, websocket = connected
+
+    for n in range(10):
+        await manager.send_download_progress("t1", {"progress": n})
+
+    pending = list(manager._pending[websocket].values())
+    assert len(pending) == 1
+    assert orjson.loads(pending[0])["data"]["progress"] == 9
@@ -137,8 +137,15 @@ export const useWebSocket = (options: UseWebSocketOptions): UseWebSocketReturn =
             return;
           }
           
-          setLastMessage(message);
-          onMessage?.(message);
+          // 服务端会把积压的多条消息合并为一个batch帧，逐条分发
+          const messages: WebSocketMessage[] = message.type === 'batch'
+            ? (message as any).messages || []
+            : [message];
+          
+          messages.forEach((item) => onMessage?.(item));
+          if (messages.length > 0) {
+            setLastMessage(messages[messages.length - 1]);
+          }
         } catch (error) {
           console.error('解析WebSocket消息失败:', error);
         }